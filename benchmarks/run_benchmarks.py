@@ -0,0 +1,362 @@
+"""Benchmark harness for the cloth simulation hot paths.
+
+Times ClothSystem.update, cut_cloth, grab_particle and the mesh renderer
+across grid sizes, solvers, precisions and iteration counts, measures the
+memory each particle and spring costs and how batch throughput scales
+with process pool size, writes the results as JSON (and optionally CSV)
+and compares them against a stored baseline:
+
+    python benchmarks/run_benchmarks.py --out bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --threshold 0.15
+
+Drawing uses SDL's dummy video driver, so no display is needed. The exit
+status is 1 when any case is slower than the baseline by more than the
+threshold.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np  # noqa: E402
+
+from cloth.batch import SceneConfig, available_cores, run_batch  # noqa: E402
+from cloth.cloth_system import ClothSystem  # noqa: E402
+from cloth.particle import Particle  # noqa: E402
+from cloth.spring import Spring  # noqa: E402
+
+DEFAULT_SIZES = ["30x25", "45x8", "100x100", "300x300"]
+WINDOW = 800
+
+
+def parse_size(text):
+    w, h = (int(v) for v in text.lower().split("x"))
+    return w, h
+
+
+def spacing_for(grid_w, grid_h):
+    """Use the app's spacing for the stock cloths and shrink larger grids to fit the window"""
+    if (grid_w, grid_h) == (45, 8):
+        return 10
+    return min(12, (WINDOW - 100) / max(grid_w - 1, grid_h - 1, 1))
+
+
+def make_cloth(grid, solver, iterations, seed=0, precision="float64"):
+    cloth_system = ClothSystem(solver=solver, seed=seed, precision=precision)
+    cloth_system.create_cloth(grid[0], grid[1], spacing_for(*grid))
+    cloth_system.num_iterations = iterations
+    return cloth_system
+
+
+def cloth_bounds(cloth_system):
+    xs = [p.x for row in cloth_system.particles for p in row]
+    ys = [p.y for row in cloth_system.particles for p in row]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def time_calls(fn, args_list):
+    """Call fn once per argument tuple and return the per-call times in ms"""
+    times = []
+    for args in args_list:
+        start = time.perf_counter_ns()
+        fn(*args)
+        times.append((time.perf_counter_ns() - start) / 1e6)
+    return times
+
+
+def bench_update(cloth_system, repeat):
+    cloth_system.update()  # warm-up packs the solver arrays
+    return time_calls(cloth_system.update, [()] * repeat)
+
+
+def bench_cut(cloth_system, repeat):
+    x0, y0, x1, y1 = cloth_bounds(cloth_system)
+    rng = random.Random(1)
+    points = [(rng.uniform(x0, x1), rng.uniform(y0, y1)) for _ in range(repeat)]
+    return time_calls(cloth_system.cut_cloth, points)
+
+
+def bench_grab(cloth_system, repeat):
+    x0, y0, x1, y1 = cloth_bounds(cloth_system)
+    rng = random.Random(2)
+    points = [(rng.uniform(x0, x1), rng.uniform(y0, y1)) for _ in range(repeat)]
+    return time_calls(cloth_system.grab_particle, points)
+
+
+def bench_draw(cloth_system, repeat, renderer_name="mesh"):
+    import pygame
+    from graphics.renderer import create_renderer
+
+    surface = pygame.Surface((WINDOW, WINDOW))
+    renderer = create_renderer(renderer_name, surface)
+    cloth_system.update()
+    renderer.draw(cloth_system)
+    return time_calls(renderer.draw, [(cloth_system,)] * repeat)
+
+
+def bench_draw_raster(cloth_system, repeat):
+    return bench_draw(cloth_system, repeat, renderer_name="raster")
+
+
+CASES = {
+    "update": bench_update,
+    "cut": bench_cut,
+    "grab": bench_grab,
+    "draw": bench_draw,
+    "draw_raster": bench_draw_raster,
+}
+
+# Cases whose cost does not depend on the solver iteration count
+ITERATION_INDEPENDENT = {"cut", "grab", "draw", "draw_raster"}
+
+
+def run_benchmarks(cases, sizes, solvers, precisions, iteration_counts, repeat):
+    results = []
+    for grid in sizes:
+        for solver in solvers:
+            for precision in precisions:
+                for iterations in iteration_counts:
+                    for case in cases:
+                        if case in ITERATION_INDEPENDENT and iterations != iteration_counts[0]:
+                            continue
+                        results.append(run_case(case, grid, solver, precision, iterations, repeat))
+    return results
+
+
+def run_case(case, grid, solver, precision, iterations, repeat):
+    cloth_system = make_cloth(grid, solver, iterations, precision=precision)
+    times = CASES[case](cloth_system, repeat)
+    record = {
+        "case": case,
+        "grid": f"{grid[0]}x{grid[1]}",
+        "solver": solver,
+        "precision": precision,
+        "iterations": iterations,
+        "repeat": len(times),
+        "mean_ms": statistics.fmean(times),
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+    }
+    print(f"{case:>8} {record['grid']:>8} {solver:>7} {precision} it={iterations:<3} "
+          f"median {record['median_ms']:9.3f} ms  min {record['min_ms']:9.3f} ms")
+    return record
+
+
+def traced(build):
+    """Bytes still allocated after build() returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def memory_usage(grid, solver, precision):
+    """Bytes per particle and per spring, as objects and as packed solver arrays"""
+    grid_w, grid_h = grid
+    spacing = spacing_for(*grid)
+    n = grid_w * grid_h
+    rng = random.Random(0)
+    particle_bytes, particles = traced(
+        lambda: [Particle(j * spacing, i * spacing, rng=rng) for i in range(grid_h) for j in range(grid_w)])
+    # Structural springs only; every spring object has the same layout
+    pairs = [(k - 1, k) for k in range(n) if k % grid_w] + [(k - grid_w, k) for k in range(grid_w, n)]
+    spring_bytes, springs = traced(lambda: [Spring(particles[a], particles[b]) for a, b in pairs])
+
+    total_bytes, cloth_system = traced(lambda: make_cloth(grid, solver, 1, precision=precision))
+    cloth_system.update()
+    num_springs = len(cloth_system.springs)
+    arrays = cloth_system.springs.arrays()
+    spring_array_bytes = sum(a.nbytes for a in (arrays.alive, arrays.i1, arrays.i2, arrays.rest_length,
+                                                arrays.stiffness, arrays.max_stretch))
+    particle_array_bytes = 0
+    if solver != "python":
+        packed = cloth_system._numpy_solver if solver == "numpy" else cloth_system._projection_solver
+        particle_array_bytes = sum(a.nbytes for a in (packed.x, packed.y, packed.px, packed.py,
+                                                      packed.fx, packed.fy, packed.mass, packed.fixed))
+    record = {
+        "grid": f"{grid_w}x{grid_h}",
+        "solver": solver,
+        "precision": precision,
+        "particles": n,
+        "springs": num_springs,
+        "particle_object_bytes": particle_bytes / n,
+        "spring_object_bytes": spring_bytes / len(springs) if springs else 0.0,
+        "particle_array_bytes": particle_array_bytes / n,
+        "spring_array_bytes": spring_array_bytes / num_springs if num_springs else 0.0,
+        "cloth_mb": total_bytes / 2**20,
+    }
+    print(f"  memory {record['grid']:>8} {solver:>7} {precision}: particle {record['particle_object_bytes']:.0f} B "
+          f"+ {record['particle_array_bytes']:.0f} B packed, spring {record['spring_object_bytes']:.0f} B "
+          f"+ {record['spring_array_bytes']:.0f} B packed, cloth {record['cloth_mb']:.1f} MB")
+    return record
+
+
+def compare_render_paths(results):
+    """Frame time of the NumPy raster path against the polygon path per grid"""
+    medians = {(r["case"], r["grid"], r["solver"]): r["median_ms"] for r in results}
+    comparisons = []
+    for (case, grid, solver), polygon_ms in medians.items():
+        raster_ms = medians.get(("draw_raster", grid, solver))
+        if case != "draw" or raster_ms is None:
+            continue
+        comparisons.append({
+            "grid": grid,
+            "solver": solver,
+            "polygon_ms": polygon_ms,
+            "raster_ms": raster_ms,
+            "speedup": polygon_ms / raster_ms if raster_ms > 0 else float("inf"),
+        })
+        print(f"render {grid:>8}: polygon {polygon_ms:9.3f} ms  raster {raster_ms:9.3f} ms  "
+              f"({comparisons[-1]['speedup']:.2f}x)")
+    return comparisons
+
+
+def batch_scaling(worker_counts, scenes, steps, grid=(30, 25)):
+    """Scenes per second of run_batch for each pool size, against one worker"""
+    configs = [SceneConfig(grid=grid, spacing=spacing_for(*grid), steps=steps, seed=i) for i in range(scenes)]
+    scaling = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        for _ in run_batch(configs, processes=workers):
+            pass
+        elapsed = time.perf_counter() - start
+        record = {
+            "workers": workers,
+            "scenes": scenes,
+            "steps": steps,
+            "grid": f"{grid[0]}x{grid[1]}",
+            "elapsed_s": elapsed,
+            "scenes_per_second": scenes / elapsed,
+        }
+        base = scaling[0]["scenes_per_second"] if scaling else record["scenes_per_second"]
+        record["speedup"] = record["scenes_per_second"] / base
+        record["efficiency"] = record["speedup"] * scaling[0]["workers"] / workers if scaling else 1.0
+        scaling.append(record)
+        print(f" batch {workers:>3} workers: {record['scenes_per_second']:7.2f} scenes/s  "
+              f"({record['speedup']:.2f}x, {record['efficiency']:.0%} efficiency)")
+    return scaling
+
+
+def result_key(record):
+    return (record["case"], record["grid"], record["solver"], record.get("precision", "float64"),
+            record["iterations"])
+
+
+def compare(results, baseline, threshold):
+    """Return the records that are slower than the baseline by more than threshold"""
+    previous = {result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for record in results:
+        old = previous.get(result_key(record))
+        if old is None or old["median_ms"] <= 0:
+            continue
+        ratio = record["median_ms"] / old["median_ms"]
+        record["baseline_median_ms"] = old["median_ms"]
+        record["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(record)
+    return regressions
+
+
+def write_csv(path, results):
+    fields = list(results[0])
+    fields += sorted({k for r in results for k in r} - set(fields))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases to run")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="comma-separated WxH grids")
+    parser.add_argument("--solvers", default="numpy", help="comma-separated solvers (python,numpy,pbd)")
+    parser.add_argument("--precisions", default="float64",
+                        help="comma-separated solver array precisions (float64,float32)")
+    parser.add_argument("--iterations", default="6", help="comma-separated solver iteration counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the per-particle/spring memory report")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per case")
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    parser.add_argument("--csv", default=None, help="also write results as CSV")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown vs. the baseline median (0.2 = 20%%)")
+    parser.add_argument("--batch-workers", default=None,
+                        help="comma-separated pool sizes for the batch scaling run "
+                             "(default: 1 and the available cores, 0 to skip)")
+    parser.add_argument("--batch-scenes", type=int, default=None,
+                        help="scenes per batch scaling run (default: 2 per core)")
+    parser.add_argument("--batch-steps", type=int, default=120, help="steps per batch scene")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cases = args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"unknown cases: {', '.join(unknown)}")
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    solvers = args.solvers.split(",")
+    precisions = args.precisions.split(",")
+    iteration_counts = [int(n) for n in args.iterations.split(",")]
+
+    if args.batch_workers is None:
+        worker_counts = sorted({1, available_cores()})
+    else:
+        worker_counts = [int(n) for n in args.batch_workers.split(",") if int(n) > 0]
+    batch_scenes = args.batch_scenes or 2 * max(worker_counts, default=1)
+
+    results = run_benchmarks(cases, sizes, solvers, precisions, iteration_counts, args.repeat)
+    memory = []
+    if not args.no_memory:
+        memory = [memory_usage(grid, solver, precision)
+                  for grid in sizes for solver in solvers for precision in precisions]
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+        "render_comparison": compare_render_paths(results),
+        "memory": memory,
+        "batch_scaling": batch_scaling(worker_counts, batch_scenes, args.batch_steps) if worker_counts else [],
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        report["threshold"] = args.threshold
+        report["regressions"] = [result_key(r) for r in regressions]
+        for r in regressions:
+            print(f"REGRESSION {r['case']} {r['grid']} {r['solver']} {r['precision']} it={r['iterations']}: "
+                  f"{r['baseline_median_ms']:.3f} -> {r['median_ms']:.3f} ms ({r['ratio']:.2f}x)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+class AdaptiveIterations:
+    """Settings for error-driven solver iterations and settle detection.
+
+    With the "pbd" solver each substep sweeps the constraints until the
+    stretch error (metric "max" or "rms", see
+    physics.projection.constraint_error) is at most tolerance, running at
+    least min_iterations and at most max_iterations sweeps. With every
+    solver, a cloth whose particles all keep their kinetic energy below
+    settle_energy for settle_frames frames is put to sleep: updates are
+    skipped until a spring is cut or a particle is moved from outside.
+    """
+
+    def __init__(self, tolerance=0.01, metric="rms", min_iterations=1, max_iterations=16,
+                 settle_energy=1e-4, settle_frames=30):
+        if metric not in ("max", "rms"):
+            raise ValueError(f"metric must be 'max' or 'rms', got {metric!r}")
+        if not 0 <= min_iterations <= max_iterations:
+            raise ValueError("need 0 <= min_iterations <= max_iterations")
+        self.tolerance = tolerance
+        self.metric = metric
+        self.min_iterations = min_iterations
+        self.max_iterations = max_iterations
+        self.settle_energy = settle_energy
+        self.settle_frames = settle_frames
+
+    def settings(self):
+        """Constructor arguments, to rebuild the same settings elsewhere"""
+        return {"tolerance": self.tolerance, "metric": self.metric, "min_iterations": self.min_iterations,
+                "max_iterations": self.max_iterations, "settle_energy": self.settle_energy,
+                "settle_frames": self.settle_frames}
+
+    def converged(self, max_error, rms_error):
+        """Whether a (max, rms) error pair is within tolerance"""
+        error = max_error if self.metric == "max" else rms_error
+        return error <= self.tolerance
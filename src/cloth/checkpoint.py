@@ -0,0 +1,242 @@
+"""Binary checkpoints of a ClothSystem.
+
+A checkpoint is a small fixed prefix, a JSON header and a run of flat
+arrays, each starting on a 64-byte boundary:
+
+    magic "CLOTHCK\\0" | uint32 version | uint32 header length | uint64 data offset
+    JSON header: settings, grid size and an (offset, dtype, shape) entry per array
+    particle arrays x, y, px, py, fx, fy, mass, fixed
+    spring arrays i1, i2, rest_length, stiffness, max_stretch (live springs, in slot order)
+    color_order, color_starts: the "pbd" solver's constraint coloring, if it has one
+    last_positions: the positions settle detection compares against, if any
+    island_labels, island_asleep, island_calm, island_last_positions: island sleep state
+
+Arrays are stored raw with their dtype recorded, so np.memmap can read
+them in place. The header also keeps the step count, the settle state and
+the adaptive, multigrid and self-collision settings, so a restored cloth
+continues bit for bit like the one that was saved:
+
+    save_checkpoint(cloth_system, "torn.ckpt")
+    branch = load_checkpoint("torn.ckpt")
+"""
+import json
+import struct
+
+import numpy as np
+
+from .adaptive import AdaptiveIterations
+from .cloth_system import ClothSystem
+from .multigrid import Multigrid
+from .self_collision import SelfCollision
+from .spring_list import SpringArrays, SpringList
+from .topology import build_particles, build_springs
+
+MAGIC = b"CLOTHCK\0"
+VERSION = 1
+_PREFIX = struct.Struct("<8sIIQ")
+_ALIGN = 64
+
+# ClothSystem attributes stored in the header
+SETTINGS = (
+    "WIDTH", "HEIGHT", "seed", "gravity", "damping", "spring_strength", "num_iterations",
+    "solver", "grab_radius", "cut_radius", "max_dead_ratio", "current_tool", "island_sleep", "steps",
+)
+
+# Optional ClothSystem components stored by their settings() and rebuilt on restore
+COMPONENTS = {"adaptive": AdaptiveIterations, "multigrid": Multigrid, "self_collision": SelfCollision}
+
+
+class CheckpointError(ValueError):
+    """Raised for files that are not readable checkpoints"""
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def state_arrays(cloth_system):
+    """The flat arrays a checkpoint stores for cloth_system"""
+    flat = cloth_system.flat_particles
+    n = len(flat)
+    arrays = {}
+    for name in ("x", "y", "px", "py", "fx", "fy", "mass"):
+        arrays[name] = np.fromiter((getattr(p, name) for p in flat), dtype=np.float64, count=n)
+    arrays["fixed"] = np.fromiter((p.fixed for p in flat), dtype=np.bool_, count=n)
+    if cloth_system.grid_index is not None:
+        arrays["grid_index"] = cloth_system.grid_index.astype(np.int32 if n < 2**31 else np.int64)
+
+    # Tombstones are left out; the live springs keep their relative order
+    packed = cloth_system.springs.arrays()
+    live = packed.alive
+    index_type = np.int32 if n < 2**31 else np.int64
+    arrays["i1"] = packed.i1[live].astype(index_type)
+    arrays["i2"] = packed.i2[live].astype(index_type)
+    # Spring values come from the objects, which keep full precision whatever the cloth's
+    springs = [s for s in cloth_system.springs.slots if s is not None]
+    arrays["rest_length"] = np.fromiter((s.rest_length for s in springs), dtype=np.float64, count=len(springs))
+    arrays["stiffness"] = np.fromiter((s.spring_constant for s in springs), dtype=np.float64, count=len(springs))
+    arrays["max_stretch"] = np.fromiter((s.max_stretch for s in springs), dtype=np.float64, count=len(springs))
+
+    # The projection order depends on the coloring, so keep it for an exact restore
+    coloring = cloth_system._projection_solver.coloring()
+    if coloring is not None:
+        order, starts = coloring
+        slot_of = np.cumsum(live) - 1
+        kept = live[order]
+        counts = np.add.reduceat(kept, starts[:-1]) if len(order) else np.zeros(0, dtype=np.int64)
+        arrays["color_order"] = slot_of[order[kept]].astype(index_type)
+        arrays["color_starts"] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    # Sleep state, so settling and island sleep carry on where they were
+    if cloth_system._last_positions is not None:
+        arrays["last_positions"] = cloth_system._last_positions
+    islands = cloth_system.islands
+    if cloth_system.island_sleep and len(islands.labels):
+        arrays["island_labels"] = islands.labels.astype(index_type)
+        arrays["island_asleep"] = islands.asleep
+        arrays["island_calm"] = islands.calm
+        if islands._last_positions is not None:
+            arrays["island_last_positions"] = islands._last_positions
+    return arrays
+
+
+def save_checkpoint(cloth_system, path):
+    """Write cloth_system's state to path"""
+    arrays = state_arrays(cloth_system)
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+
+    header = {
+        "settings": dict({name: getattr(cloth_system, name) for name in SETTINGS}, precision=cloth_system.precision),
+        "grid": [cloth_system.grid_w, cloth_system.grid_h],
+        "rng_state": cloth_system.rng.getstate(),
+        "sleep": {"asleep": cloth_system._asleep, "calm_frames": cloth_system._calm_frames},
+        "components": {name: None if getattr(cloth_system, name) is None else getattr(cloth_system, name).settings()
+                       for name in COMPONENTS},
+        "arrays": table,
+    }
+    header_bytes = json.dumps(header).encode()
+    data_offset = _aligned(_PREFIX.size + len(header_bytes))
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header_bytes), data_offset))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_offset + table[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        # Pad to the end of the last array's aligned block
+        f.truncate(data_offset + offset)
+
+
+class Checkpoint:
+    """A checkpoint file opened for reading.
+
+    With mmap the arrays are read-only views into the mapped file, so
+    opening is cheap regardless of cloth size; restore() builds a new
+    ClothSystem from them.
+    """
+
+    def __init__(self, path, mmap=True):
+        with open(path, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                raise CheckpointError(f"{path}: file too short for a checkpoint")
+            magic, version, header_len, data_offset = _PREFIX.unpack(prefix)
+            if magic != MAGIC:
+                raise CheckpointError(f"{path}: not a cloth checkpoint")
+            if version > VERSION:
+                raise CheckpointError(f"{path}: checkpoint version {version} is newer than supported ({VERSION})")
+            self.header = json.loads(f.read(header_len))
+
+        self.version = version
+        self.path = path
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset)
+        else:
+            data = np.fromfile(path, dtype=np.uint8, offset=data_offset)
+        self.arrays = {}
+        for name, entry in self.header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            start = entry["offset"]
+            raw = data[start:start + count * dtype.itemsize]
+            self.arrays[name] = raw.view(dtype).reshape(entry["shape"])
+
+    @property
+    def settings(self):
+        return self.header["settings"]
+
+    def restore(self):
+        """Build a ClothSystem in the saved state (without running create_cloth)"""
+        settings = self.settings
+        cloth_system = ClothSystem(solver=settings["solver"], seed=settings["seed"],
+                                   width=settings["WIDTH"], height=settings["HEIGHT"], default_cloth=False,
+                                   precision=settings.get("precision", "float64"))
+        for name in SETTINGS:
+            if name in settings:
+                setattr(cloth_system, name, settings[name])
+        for name, settings in self.header.get("components", {}).items():
+            if settings is not None:
+                setattr(cloth_system, name, COMPONENTS[name](**settings))
+        version, internal, gauss_next = self.header["rng_state"]
+        cloth_system.rng.setstate((version, tuple(internal), gauss_next))
+
+        a = self.arrays
+        flat = build_particles(a["x"].tolist(), a["y"].tolist(), a["px"].tolist(), a["py"].tolist(),
+                               a["fx"].tolist(), a["fy"].tolist(), a["mass"].tolist(), a["fixed"].tolist())
+        grid_w, grid_h = self.header["grid"]
+        cloth_system.grid_w = grid_w
+        cloth_system.grid_h = grid_h
+        if "grid_index" in a:
+            # Mask-shaped cloth: one row per grid row that holds particles
+            index = np.array(a["grid_index"], dtype=np.int64)
+            cloth_system.grid_index = index
+            rows = np.count_nonzero(index >= 0, axis=1)
+            ends = np.cumsum(rows).tolist()
+            cloth_system.particles = [flat[end - count:end] for end, count in zip(ends, rows.tolist()) if count]
+        elif grid_w * grid_h == len(flat):
+            cloth_system.particles = [flat[i:i + grid_w] for i in range(0, len(flat), grid_w)]
+        else:
+            cloth_system.particles = [flat]
+        cloth_system.flat_particles = flat
+        cloth_system.particle_index = {id(p): i for i, p in enumerate(flat)}
+
+        springs = SpringList(dtype=cloth_system.dtype)
+        springs.extend(build_springs(flat, a["i1"].tolist(), a["i2"].tolist(), a["rest_length"].tolist(),
+                                     a["stiffness"].tolist(), a["max_stretch"].tolist()))
+        packed = SpringArrays.packed(a["i1"], a["i2"], a["rest_length"], a["stiffness"], a["max_stretch"],
+                                     cloth_system.dtype)
+        springs.bind(cloth_system.particle_index, packed)
+        cloth_system.springs = springs
+        cloth_system._index.invalidate()
+        cloth_system.islands.reset()
+        if "color_order" in a:
+            cloth_system._projection_solver.set_coloring(a["color_order"], a["color_starts"])
+        self._restore_sleep(cloth_system)
+        return cloth_system
+
+    def _restore_sleep(self, cloth_system):
+        """Carry over settle detection and island sleep state"""
+        a = self.arrays
+        sleep = self.header.get("sleep", {})
+        cloth_system._asleep = sleep.get("asleep", False)
+        cloth_system._calm_frames = sleep.get("calm_frames", 0)
+        cloth_system._sleep_version = cloth_system.springs.version
+        if "last_positions" in a:
+            cloth_system._last_positions = np.array(a["last_positions"])
+        if "island_labels" in a:
+            # The next refresh relabels from the springs and keeps the state of unchanged islands
+            islands = cloth_system.islands
+            islands.labels = np.array(a["island_labels"], dtype=np.int64)
+            islands.asleep = np.array(a["island_asleep"])
+            islands.calm = np.array(a["island_calm"])
+            if "island_last_positions" in a:
+                islands._last_positions = np.array(a["island_last_positions"])
+
+
+def load_checkpoint(path, mmap=True):
+    """Restore the ClothSystem saved at path"""
+    return Checkpoint(path, mmap).restore()
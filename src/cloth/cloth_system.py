@@ -1,16 +1,37 @@
-import pygame
-import math
 import random
 import numpy as np
-from .particle import Particle
-from .spring import Spring
+from .spring_list import SpringArrays, SpringList
+from .topology import build_particles, build_springs, grid_template, load_mask, mask_template
+from .numpy_solver import NumpySolver
+from .pbd_solver import ProjectionSolver
+from .spatial_hash import ClothIndex
+from .islands import IslandTracker
+from .profiler import Profiler
+
+# Solver backends accepted by ClothSystem(solver=...)
+SOLVERS = ("python", "numpy", "pbd")
+
+# Float types accepted by ClothSystem(precision=...) for the packed solver arrays
+PRECISIONS = ("float64", "float32")
 
 class ClothSystem:
-    def __init__(self):
-        self.WIDTH = 800
-        self.HEIGHT = 800
+    def __init__(self, solver="python", seed=None, width=800, height=800, default_cloth=True, precision="float64"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {', '.join(PRECISIONS)}, not {precision!r}")
+        self.WIDTH = width
+        self.HEIGHT = height
+        self.seed = seed
+        self.precision = precision  # Float type of the "numpy"/"pbd" particle and spring arrays
+        self.dtype = np.dtype(precision)
+        self.rng = random.Random(seed)  # Drives the initial particle jitter
         self.particles = []
-        self.springs = []
+        self.springs = SpringList(dtype=self.dtype)
+        self.flat_particles = []
+        self.particle_index = {}
+        self.grabbed = None  # Flat index of the last grabbed particle, which the mouse may move between steps
+        self.grid_w = 0
+        self.grid_h = 0
+        self.grid_index = None  # Grid cell -> particle index for mask-shaped cloths (-1 where empty)
         self.gravity = 0.15
         self.damping = 0.99
         self.spring_strength = 0.2
@@ -18,209 +39,311 @@ class ClothSystem:
         
         # Simulation settings
         self.num_iterations = 6
+        self.solver = solver  # "python" (per-object), "numpy" (structure-of-arrays) or "pbd" (constraint projection)
+        self._numpy_solver = NumpySolver(self)
+        self._projection_solver = ProjectionSolver(self)
+        self.max_dead_ratio = 0.25  # Compact springs past this tombstone share (None = never)
+        self.adaptive = None  # AdaptiveIterations settings, or None to run num_iterations every frame
+        self.multigrid = None  # Multigrid hierarchy for the "pbd" solver, or None for flat sweeps only
+        self.frame_stats = {}  # Iterations, errors and sleep state of the last update()
+        self._asleep = False
+        self._calm_frames = 0
+        self._last_positions = None
+        self._sleep_version = None
+        self.island_sleep = False  # Let settled or detached pieces of cloth sleep
+        self.islands = IslandTracker(self)
+        self.recorder = None  # TrajectoryRecorder handed every frame, or None
+        self.steps = 0  # update() calls so far
+        self.self_collision = None  # SelfCollision settings, or None to let the cloth pass through itself
+        self.profiler = Profiler()  # Stage timings and counters; disabled unless switched on
+
+        # Interaction radii; the spatial index cell size is tied to them
+        self.grab_radius = 15
+        self.cut_radius = 20
+        self._index = ClothIndex(self, cell_size=max(self.grab_radius, self.cut_radius))
         
-        # Cloth appearance
-        self.cloth_color_a = (158, 98, 204)
-        self.cloth_color_b = (130, 80, 200)
-        self.highlight_color = (255, 255, 255)
-        
-        # Light parameters
-        self.ambient_light = 0.3
-        self.specular_intensity = 0.4
-        self.light_dir = pygame.Vector2(0.707, -0.707).normalize()
-        
-        # Create initial cloth
-        self.create_cloth(30, 25, 12)
+        # Create initial cloth (left out when the state comes from elsewhere, e.g. a checkpoint)
+        if default_cloth:
+            self.create_cloth(30, 25, 12)
 
     def create_cloth(self, grid_w, grid_h, spacing):
         """Create a cloth grid"""
-        self.particles = []
-        self.springs = []
+        self._place(grid_template(grid_w, grid_h), spacing)
+
+    def create_from_mask(self, mask, spacing, size=None, pin_every=3):
+        """Create a cloth in the shape of a 2D boolean mask or an image's alpha channel.
+
+        mask is a boolean array (one particle per set cell) or the path of
+        an image; size resamples the image to (grid_w, grid_h) particles.
+        The topmost particle of every pin_every-th column is pinned.
+        """
+        if isinstance(mask, str):
+            mask = load_mask(mask, size)
+        self._place(mask_template(mask, pin_every), spacing)
+
+    def _place(self, template, spacing):
+        """Build particles and springs from a topology template in bulk"""
+        grid_h, grid_w = template.shape
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.grid_index = None if template.full else template.index
         start_x = (self.WIDTH - (grid_w - 1) * spacing) // 2
         start_y = 60
+        x = start_x + template.cols * spacing
+        y = start_y + template.rows * spacing
 
-        # Create particles
-        for i in range(grid_h):
-            row = []
-            for j in range(grid_w):
-                fixed = i == 0 and j % 3 == 0
-                p = Particle(start_x + j * spacing, start_y + i * spacing, fixed)
-                row.append(p)
-                
-                # Create structural springs (horizontal and vertical) with higher strength
-                if j > 0: 
-                    self.springs.append(Spring(row[j-1], p, strength=0.25, breaking_threshold=8.0))  # Horizontal springs
-                if i > 0:
-                    self.springs.append(Spring(self.particles[i-1][j], p, strength=0.25, breaking_threshold=8.0))  # Vertical springs
-                
-                # Create shear springs (diagonals) with higher strength
-                if i > 0 and j > 0:
-                    self.springs.append(Spring(self.particles[i-1][j-1], p, strength=0.08, breaking_threshold=6.0))
-                if i > 0 and j < grid_w-1:
-                    self.springs.append(Spring(self.particles[i-1][j+1], p, strength=0.08, breaking_threshold=6.0))
-                
-                # Add bend resistance springs with higher strength
-                if j > 1:  # Horizontal bend springs
-                    self.springs.append(Spring(row[j-2], p, strength=0.03, breaking_threshold=5.0))
-                if i > 1:  # Vertical bend springs
-                    self.springs.append(Spring(self.particles[i-2][j], p, strength=0.03, breaking_threshold=5.0))
-            
-            self.particles.append(row)
+        # Free particles get a small initial displacement to avoid a grid-like appearance,
+        # drawn from the seeded rng in the same order Particle.__init__ would
+        n = len(template)
+        free = ~template.fixed
+        jitter = np.array([self.rng.random() for _ in range(2 * int(free.sum()))]).reshape(-1, 2)
+        px = x.astype(float)
+        py = y.astype(float)
+        px[free] += (jitter[:, 0] * 2 - 1) * 0.1
+        py[free] += (jitter[:, 1] * 2 - 1) * 0.1
+        flat = build_particles(x.tolist(), y.tolist(), px.tolist(), py.tolist(), [0] * n, [0] * n, [1.0] * n,
+                               template.fixed.tolist())
+
+        # Rest lengths are measured on the placed grid, like Spring.__init__ does
+        i1, i2 = template.i1, template.i2
+        rest_length = np.hypot(x[i2] - x[i1], y[i2] - y[i1])
+        max_stretch = rest_length * template.threshold
+        self.springs = SpringList(dtype=self.dtype)
+        self.springs.extend(build_springs(flat, i1.tolist(), i2.tolist(), rest_length.tolist(),
+                                          template.stiffness.tolist(), max_stretch.tolist()))
+
+        # Flat particle order shared by the array-based code paths
+        rows = np.bincount(template.rows, minlength=grid_h)
+        ends = np.cumsum(rows).tolist()
+        self.particles = [flat[end - count:end] for end, count in zip(ends, rows.tolist()) if count]
+        self.flat_particles = flat
+        self.particle_index = {id(p): i for i, p in enumerate(flat)}
+        self.grabbed = None
+        self.springs.bind(self.particle_index, SpringArrays.packed(
+            i1, i2, rest_length, template.stiffness, max_stretch, self.dtype))
+        self._index.invalidate()
+        self._asleep = False
+        self._calm_frames = 0
+        self._last_positions = None
+        self.islands.reset()
 
     def create_strip(self):
         """Create a cloth strip"""
         self.create_cloth(45, 8, 10)
 
+    def positions(self):
+        """Particle positions as an (N, 2) array in flat_particles order"""
+        flat = self.flat_particles
+        n = len(flat)
+        positions = np.empty((n, 2))
+        positions[:, 0] = np.fromiter((p.x for p in flat), dtype=float, count=n)
+        positions[:, 1] = np.fromiter((p.y for p in flat), dtype=float, count=n)
+        return positions
+
+    @property
+    def residuals(self):
+        """Constraint error before and after each iteration of the last "pbd" step"""
+        return self._projection_solver.residuals if self.solver == "pbd" else []
+
+    @property
+    def spatial_index(self):
+        """Spatial index over particles and springs for radius/segment queries"""
+        self._index.refresh()
+        return self._index
+
     def update(self):
         """Update the cloth physics"""
+        self.steps += 1
+        if self._asleep:
+            # A settled cloth costs nothing until something disturbs it
+            if not self._disturbed():
+                self.frame_stats = {"iterations": 0, "asleep": True}
+                if self.recorder is not None:
+                    self.recorder.record(self)
+                return
+            self._asleep = False
+            self._calm_frames = 0
+
+        # Particles move every step, so the spatial index is rebuilt on next query
+        self._index.invalidate()
+
+        # Particles of sleeping islands are held still
+        profiler = self.profiler
+        frozen = None
+        if self.island_sleep:
+            with profiler.stage("islands"):
+                self.islands.refresh()
+                if self.grabbed is not None:
+                    # A held particle can be dragged again after its island fell asleep
+                    self.islands.wake_moved([self.grabbed])
+                frozen = self.islands.frozen()
+
+        live_springs = len(self.springs)
+        if self.solver == "numpy":
+            self._numpy_solver.step(self.num_iterations, self.gravity, self.damping, frozen)
+        elif self.solver == "pbd":
+            self._projection_solver.step(self.num_iterations, self.gravity, self.damping, self.adaptive, frozen)
+        else:
+            self._update_objects(frozen)
+
+        profiler.add("broken_springs", live_springs - len(self.springs))
+        profiler.count("live_springs", len(self.springs))
+
+        # Squeeze out removed springs once they pile up
+        if self.max_dead_ratio is not None:
+            self.springs.maybe_compact(self.max_dead_ratio)
+
+        self._record_frame()
+        if self.recorder is not None:
+            with profiler.stage("recorder"):
+                self.recorder.record(self)
+
+    def _record_frame(self):
+        """Fill frame_stats, advance island sleep and put a settled cloth to sleep"""
+        stats = {"iterations": self.num_iterations, "asleep": False}
+        if self.solver == "pbd":
+            solver = self._projection_solver
+            stats.update(iterations=solver.iterations, max_error=solver.max_error, rms_error=solver.rms_error)
+
+        if self.self_collision is not None:
+            stats.update(self.self_collision.stats)
+            self.profiler.count("collision_pairs", stats["particle_pairs"] + stats["edge_pairs"])
+            self.profiler.count("contacts", stats["particle_contacts"] + stats["edge_contacts"])
+
+        adaptive = self.adaptive
+        positions = self.positions() if adaptive is not None or self.island_sleep else None
+        if self.island_sleep:
+            self.islands.update(positions)
+            stats.update(self.islands.stats())
+
+        if adaptive is not None:
+            # Highest kinetic energy of any particle (unit mass) from the motion over this frame,
+            # so a small piece still swinging keeps a large cloth awake
+            last = self._last_positions
+            energy = float("inf")
+            if last is not None and last.shape == positions.shape:
+                moved = positions - last
+                energy = 0.5 * float(np.max(np.sum(moved * moved, axis=1), initial=0.0))
+            self._last_positions = positions
+            self._calm_frames = self._calm_frames + 1 if energy < adaptive.settle_energy else 0
+            if self._calm_frames >= adaptive.settle_frames:
+                self._asleep = True
+                self._sleep_version = self.springs.version
+            stats["kinetic_energy"] = energy
+        self.frame_stats = stats
+
+    def _disturbed(self):
+        """Whether a sleeping cloth was cut or had a particle moved since it settled"""
+        if self.springs.version != self._sleep_version:
+            return True
+        positions = self.positions()
+        return positions.shape != self._last_positions.shape or not np.array_equal(positions, self._last_positions)
+
+    def _update_objects(self, frozen=None):
+        """Run the solver iterations one Particle/Spring object at a time"""
+        particles = self.flat_particles
+        springs = self.springs
+        if frozen is not None:
+            # Leave out sleeping particles and the springs between them
+            particles = [p for p, f in zip(self.flat_particles, frozen.tolist()) if not f]
+            arrays = self.springs.arrays()
+            slots = self.springs.slots
+            active = np.flatnonzero(arrays.alive & ~(frozen[arrays.i1] & frozen[arrays.i2]))
+            springs = [slots[k] for k in active.tolist()]
+
         # Run multiple iterations for stability
+        stage = self.profiler.stage
         for _ in range(self.num_iterations):
             # Update springs and remove broken ones
-            self.springs = [s for s in self.springs if not s.apply()]
+            with stage("springs"):
+                broken = [s for s in springs if s.apply()]
+                for s in broken:
+                    self.springs.remove(s)
+                if broken and frozen is not None:
+                    springs = [s for s in springs if not s.broken]
             
             # Update particles
-            for row in self.particles:
-                for p in row:
+            with stage("particles"):
+                for p in particles:
                     p.update(self.gravity, self.damping)
             
             # Apply constraints like boundary collisions
-            self._apply_constraints()
+            with stage("constraints"):
+                self._apply_constraints(particles)
+
+        if self.self_collision is not None:
+            with stage("collision"):
+                self._collide_objects(frozen)
+
+    def _collide_objects(self, frozen=None):
+        """Resolve self-collisions on packed positions and write back the particles that moved"""
+        flat = self.flat_particles
+        positions = self.positions()
+        x, y = positions[:, 0].copy(), positions[:, 1].copy()
+        pinned = np.fromiter((p.fixed for p in flat), dtype=bool, count=len(flat))
+        if frozen is not None:
+            pinned |= frozen
+        mass = np.fromiter((p.mass for p in flat), dtype=float, count=len(flat))
+        if self.self_collision.apply(x, y, np.where(pinned, 0.0, 1.0 / mass), self.springs):
+            moved = np.flatnonzero((x != positions[:, 0]) | (y != positions[:, 1]))
+            for i, px, py in zip(moved.tolist(), x[moved].tolist(), y[moved].tolist()):
+                flat[i].x = px
+                flat[i].y = py
     
-    def _apply_constraints(self):
+    def _apply_constraints(self, particles=None):
         """Apply constraints to keep particles within bounds"""
         buffer = 5  # Buffer from edges
         
-        for row in self.particles:
-            for p in row:
-                # Only apply to non-fixed particles
-                if not p.fixed:
-                    # Constrain to window boundaries with a little bounce
-                    if p.x < buffer:
-                        p.x = buffer
-                        p.px = p.x + (p.x - p.px) * 0.4  # Bounce effect
-                    elif p.x > self.WIDTH - buffer:
-                        p.x = self.WIDTH - buffer
-                        p.px = p.x + (p.x - p.px) * 0.4  # Bounce effect
-                        
-                    if p.y > self.HEIGHT - buffer:
-                        p.y = self.HEIGHT - buffer
-                        p.px = p.x + (p.y - p.py) * 0.2  # Reduced bounce for floor
-
-    def draw(self, screen):
-        """Draw the cloth to the screen"""
-        # Check if we have a grid-like structure
-        if len(self.particles) > 1 and all(len(row) > 1 for row in self.particles):
-            self._draw_cloth_mesh(screen)
-        else:
-            self._draw_non_mesh(screen)
-    
-    def _draw_cloth_mesh(self, screen):
-        """Draw cloth as colored triangles with lighting"""
-        # Create a set of valid connections for quick lookup
-        connections = set()
-        for s in self.springs:
-            if not s.broken:
-                connections.add((s.p1, s.p2))
-                connections.add((s.p2, s.p1))
-        
-        for i in range(len(self.particles) - 1):
-            for j in range(len(self.particles[i]) - 1):
-                p1 = self.particles[i][j]
-                p2 = self.particles[i][j+1]
-                p3 = self.particles[i+1][j]
-                p4 = self.particles[i+1][j+1]
-
-                # First triangle (if connections exist)
-                if (p1, p2) in connections and (p2, p4) in connections and (p1, p4) in connections:
-                    diffuse, specular = self._calculate_lighting(p1, p2, p4)
-                    color = self._adjust_color(
-                        self.cloth_color_a if (i+j)%2 else self.cloth_color_b, 
-                        diffuse, specular
-                    )
-                    pygame.draw.polygon(screen, color, [p1.pos(), p2.pos(), p4.pos()])
-
-                # Second triangle (if connections exist)
-                if (p1, p4) in connections and (p4, p3) in connections and (p1, p3) in connections:
-                    diffuse, specular = self._calculate_lighting(p1, p4, p3)
-                    color = self._adjust_color(
-                        self.cloth_color_a if (i+j)%2 else self.cloth_color_b, 
-                        diffuse, specular
-                    )
-                    pygame.draw.polygon(screen, color, [p1.pos(), p4.pos(), p3.pos()])
-    
-    def _calculate_lighting(self, p1, p2, p3):
-        """Calculate lighting for a cloth triangle"""
-        edge1 = pygame.Vector2(p2.x - p1.x, p2.y - p1.y)
-        edge2 = pygame.Vector2(p3.x - p1.x, p3.y - p1.y)
-        
-        # For 2D vectors, cross product is a scalar
-        normal_z = edge1.cross(edge2)
-        
-        if abs(normal_z) < 1e-6:
-            return self.ambient_light, 0
-        
-        # Create a normal vector perpendicular to the surface
-        normal = pygame.Vector2(-edge1.y, edge1.x) if normal_z > 0 else pygame.Vector2(edge1.y, -edge1.x)
-        normal.normalize_ip()
-        
-        diffuse = max(normal.dot(self.light_dir), 0)
-        
-        # Specular calculation
-        view_dir = pygame.Vector2(0, -1)
-        reflect_dir = 2 * normal.dot(self.light_dir) * normal - self.light_dir
-        specular = max(reflect_dir.dot(view_dir), 0) ** 32
-        specular *= self.specular_intensity
-        
-        return self.ambient_light + (1 - self.ambient_light) * diffuse, specular
-    
-    def _adjust_color(self, base_color, diffuse, specular):
-        """Adjust color based on lighting"""
-        r = min(255, int(base_color[0] * diffuse) + int(255 * specular))
-        g = min(255, int(base_color[1] * diffuse) + int(255 * specular))
-        b = min(255, int(base_color[2] * diffuse) + int(255 * specular))
-        return (r, g, b)
-    
-    def grab_particle(self, x, y, radius=15):
-        """Find and return a particle at the given coordinates"""
-        min_dist = float('inf')
-        closest_particle = None
-        
-        for row in self.particles:
-            for p in row:
-                dist = (p.x - x)**2 + (p.y - y)**2
-                if dist < min_dist and dist < radius**2:
-                    min_dist = dist
-                    closest_particle = p
+        for p in self.flat_particles if particles is None else particles:
+            # Only apply to non-fixed particles
+            if not p.fixed:
+                # Constrain to window boundaries with a little bounce
+                if p.x < buffer:
+                    p.x = buffer
+                    p.px = p.x + (p.x - p.px) * 0.4  # Bounce effect
+                elif p.x > self.WIDTH - buffer:
+                    p.x = self.WIDTH - buffer
+                    p.px = p.x + (p.x - p.px) * 0.4  # Bounce effect
                     
-        return closest_particle
+                if p.y > self.HEIGHT - buffer:
+                    p.y = self.HEIGHT - buffer
+                    p.px = p.x + (p.y - p.py) * 0.2  # Reduced bounce for floor
+
+    def grab_particle(self, x, y, radius=None):
+        """Find and return a particle at the given coordinates"""
+        if radius is None:
+            radius = self.grab_radius
+        particle = self._index.nearest_particle(x, y, radius)
+        self.grabbed = None if particle is None else self.particle_index[id(particle)]
+        if particle is not None and self.island_sleep:
+            self.islands.wake_particle(self.grabbed)
+        return particle
+
+    def particles_changed(self, indices=None):
+        """Report particles changed outside update() and grab_particle(), by flat index (all when None).
+
+        The "numpy" and "pbd" solvers keep their own arrays between steps
+        and only reread these particles (and the grabbed one) from the objects.
+        Sleeping islands wake if any of these particles moved.
+        """
+        self._numpy_solver.invalidate(indices)
+        self._projection_solver.invalidate(indices)
+        if self.island_sleep:
+            self.islands.wake_moved(range(len(self.flat_particles)) if indices is None else indices)
     
-    def cut_cloth(self, x, y, radius=20):
+    def cut_cloth(self, x, y, radius=None):
         """Cut springs near the given coordinates"""
-        springs_to_remove = []
-        
-        for spring in self.springs:
-            # Calculate closest point on spring line to the mouse position
-            p1, p2 = spring.p1, spring.p2
-            
-            # Vector from p1 to p2
-            line = (p2.x - p1.x, p2.y - p1.y)
-            line_length_squared = line[0]**2 + line[1]**2
-            
-            if line_length_squared == 0:  # p1 and p2 are the same point
-                closest_point = (p1.x, p1.y)
-            else:
-                # Vector from p1 to mouse
-                t = max(0, min(1, ((x - p1.x) * line[0] + (y - p1.y) * line[1]) / line_length_squared))
-                closest_point = (p1.x + t * line[0], p1.y + t * line[1])
-            
-            # Check if the closest point is within the cut radius
-            dist = math.hypot(closest_point[0] - x, closest_point[1] - y)
-            if dist < radius:
-                springs_to_remove.append(spring)
+        return self.cut_segment(x, y, x, y, radius)
+
+    def cut_segment(self, x0, y0, x1, y1, radius=None):
+        """Cut springs within radius of the stroke from (x0, y0) to (x1, y1)"""
+        if radius is None:
+            radius = self.cut_radius
+        # One vectorized capsule test over the candidate springs near the stroke
+        springs_to_remove = self._index.springs_near_segment(x0, y0, x1, y1, radius)
         
-        # Remove the springs
+        # Remove the springs (tombstoned in O(1) each; the index skips tombstones)
         for spring in springs_to_remove:
-            if spring in self.springs:
-                self.springs.remove(spring)
+            self.springs.discard(spring)
         
-        return len(springs_to_remove) > 0
\ No newline at end of file
+        return len(springs_to_remove) > 0
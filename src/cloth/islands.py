@@ -0,0 +1,205 @@
+import numpy as np
+
+from physics.cells import cell_coords, pack
+
+
+def connected_components(num_points, i1, i2):
+    """Label each point with the smallest point index of its component.
+
+    i1 and i2 are the edge endpoints. Labels are propagated across edges
+    with pointer jumping until nothing changes, all as vectorized passes.
+    """
+    labels = np.arange(num_points)
+    if not len(i1):
+        return labels
+    while True:
+        low = np.minimum(labels[i1], labels[i2])
+        updated = labels.copy()
+        np.minimum.at(updated, i1, low)
+        np.minimum.at(updated, i2, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class IslandTracker:
+    """Connected pieces of cloth and which of them are asleep.
+
+    Islands are the connected components of the live spring graph. Cutting
+    or breaking springs can only split islands, so after removals only the
+    islands that lost a spring are relabelled, using the SpringList's
+    removed-slot log. An island whose particles all move less than
+    speed_threshold per frame for sleep_frames frames goes to sleep, and
+    the solvers then treat its particles as fixed and skip its springs.
+    Sleeping islands wake when a spring of theirs is cut, when one of
+    their particles is grabbed or moved from outside (see wake_moved), or
+    on contact: an awake particle moving
+    faster than speed_threshold coming within contact_radius of one of
+    their particles. Awake pieces at rest don't wake their neighbours, so
+    touching pieces that settle on different frames all end up asleep.
+    """
+
+    def __init__(self, cloth, speed_threshold=0.05, sleep_frames=30, contact_radius=8.0):
+        self.cloth = cloth
+        self.speed_threshold = speed_threshold
+        self.sleep_frames = sleep_frames
+        self.contact_radius = contact_radius
+        self.reset()
+
+    def reset(self):
+        """Forget all islands; they are relabelled on the next refresh"""
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.asleep = np.zeros(0, dtype=bool)
+        self.calm = np.zeros(0, dtype=np.int64)
+        self._layout_key = None
+        self._removed_seen = 0
+        self._last_positions = None
+        self._contact_keys = None
+        self._contact_islands = None
+
+    @property
+    def num_islands(self):
+        return len(self.asleep)
+
+    def refresh(self):
+        """Bring the island labels up to date with the spring topology"""
+        springs = self.cloth.springs
+        arrays = springs.arrays()
+        num_points = len(self.cloth.flat_particles)
+        layout_key = (id(springs), springs.layout_version, num_points)
+        if layout_key != self._layout_key:
+            # New cloth or compacted slots (which may hide unseen removals): relabel everything
+            live = arrays.alive
+            self._set_labels(connected_components(num_points, arrays.i1[live], arrays.i2[live]))
+            self._layout_key = layout_key
+            self._removed_seen = len(springs.removed)
+            return
+
+        removed = springs.removed[self._removed_seen:]
+        if not removed:
+            return
+        self._removed_seen = len(springs.removed)
+        touched = np.unique(self.labels[np.concatenate([arrays.i1[removed], arrays.i2[removed]])])
+
+        # Relabel just the particles of the islands that lost springs; they wake up
+        inside = np.isin(self.labels, touched)
+        members = np.flatnonzero(inside)
+        local = np.full(num_points, -1, dtype=np.int64)
+        local[members] = np.arange(len(members))
+        edges = arrays.alive & inside[arrays.i1]
+        sub = connected_components(len(members), local[arrays.i1[edges]], local[arrays.i2[edges]])
+        labels = self.labels.copy()
+        labels[members] = num_points + members[sub]  # fresh labels, clear of the old ones
+        self._set_labels(labels, woken=inside)
+
+    def _set_labels(self, raw_labels, woken=None):
+        """Compact raw labels to 0..k-1, carrying over the state of unchanged islands.
+
+        An island keeps its sleep state if it has exactly the particles of
+        an old island and none of them are in the woken mask.
+        """
+        _, first, labels = np.unique(raw_labels, return_index=True, return_inverse=True)
+        count = len(first)
+        asleep = np.zeros(count, dtype=bool)
+        calm = np.zeros(count, dtype=np.int64)
+        if len(self.labels) == len(labels):
+            old = self.labels[first]
+            changed = self.labels != old[labels]
+            if woken is not None:
+                changed |= woken
+            same = np.bincount(labels, weights=changed, minlength=count) == 0
+            same &= np.bincount(labels, minlength=count) == np.bincount(self.labels, minlength=self.num_islands)[old]
+            asleep[same] = self.asleep[old[same]]
+            calm[same] = self.calm[old[same]]
+        self.labels = labels
+        self.asleep = asleep
+        self.calm = calm
+        self._contact_keys = None
+
+    def frozen(self):
+        """Mask of particles in sleeping islands, or None if every island is awake"""
+        if not self.asleep.any():
+            return None
+        return self.asleep[self.labels]
+
+    def wake(self, islands):
+        """Wake the given islands"""
+        islands = np.asarray(islands, dtype=np.int64)
+        if self.asleep[islands].any():
+            self._contact_keys = None
+        self.asleep[islands] = False
+        self.calm[islands] = 0
+
+    def wake_particle(self, index):
+        """Wake the island holding the particle at flat index"""
+        if index < len(self.labels):
+            self.wake([self.labels[index]])
+
+    def wake_moved(self, indices):
+        """Wake the islands of particles (flat indices) that moved since the last frame, e.g. by dragging"""
+        last = self._last_positions
+        if last is None or not self.asleep.any():
+            return
+        flat = self.cloth.flat_particles
+        moved = [i for i in indices if i < len(last) and i < len(self.labels)
+                 and (flat[i].x, flat[i].y) != tuple(last[i].tolist())]
+        if moved:
+            self.wake(self.labels[moved])
+
+    def update(self, positions):
+        """Advance sleep counters from this frame's positions and handle contact"""
+        last = self._last_positions
+        self._last_positions = positions
+        if last is None or last.shape != positions.shape or len(self.labels) != len(positions):
+            return
+
+        moved = positions - last
+        speed = np.hypot(moved[:, 0], moved[:, 1])
+        island_speed = np.zeros(self.num_islands)
+        np.maximum.at(island_speed, self.labels, speed)
+        awake = ~self.asleep
+        self.calm = np.where(awake & (island_speed < self.speed_threshold), self.calm + 1, 0)
+        settled = awake & (self.calm >= self.sleep_frames)
+        if settled.any():
+            self.asleep |= settled
+            self._contact_keys = None
+
+        if self.asleep.any() and not self.asleep.all():
+            self._wake_on_contact(positions, speed >= self.speed_threshold)
+
+    def _cells(self, xs, ys):
+        return cell_coords(xs, self.contact_radius), cell_coords(ys, self.contact_radius)
+
+    def _wake_on_contact(self, positions, moving):
+        """Wake sleeping islands that a moving awake particle has come close to"""
+        if self._contact_keys is None:
+            # Cells around every sleeping particle; fixed while those islands sleep
+            sleeping = np.flatnonzero(self.asleep[self.labels])
+            cx, cy = self._cells(positions[sleeping, 0], positions[sleeping, 1])
+            dx, dy = np.meshgrid([-1, 0, 1], [-1, 0, 1])
+            keys = pack(cx[:, None] + dx.ravel(), cy[:, None] + dy.ravel())
+            self._contact_keys = keys.ravel()
+            self._contact_islands = np.repeat(self.labels[sleeping], 9)
+
+        awake = np.flatnonzero(~self.asleep[self.labels] & moving)
+        if not len(awake):
+            return
+        keys = pack(*self._cells(positions[awake, 0], positions[awake, 1]))
+        hits = np.isin(self._contact_keys, keys)
+        if hits.any():
+            self.wake(np.unique(self._contact_islands[hits]))
+
+    def stats(self):
+        frozen = self.asleep[self.labels] if len(self.labels) else np.zeros(0, dtype=bool)
+        arrays = self.cloth.springs.arrays()
+        live = arrays.alive
+        sleeping_springs = int(np.count_nonzero(live & frozen[arrays.i1])) if len(frozen) else 0
+        return {
+            "islands": self.num_islands,
+            "sleeping_islands": int(np.count_nonzero(self.asleep)),
+            "active_particles": int(np.count_nonzero(~frozen)),
+            "sleeping_particles": int(np.count_nonzero(frozen)),
+            "active_springs": int(np.count_nonzero(live)) - sleeping_springs,
+            "sleeping_springs": sleeping_springs,
+        }
@@ -0,0 +1,249 @@
+"""Hierarchical constraint projection for large grid cloths.
+
+A Gauss-Seidel sweep carries a correction about one spring along, so the
+stretch left after a fixed number of sweeps grows with the resolution of
+the grid. Multigrid (ClothSystem.multigrid, used by the "pbd" solver)
+takes every stride-th row and column of the create_cloth grid as the
+nodes of a coarser level, for strides 2, 4, 8, ... Each level has
+stretch-only distance constraints along its rows and columns and across
+both diagonals of each block, with rest lengths summed from the fine
+springs they span. Every substep the levels are projected coarsest
+first, and each level's node corrections are spread over the fine
+particles of its blocks by bilinear interpolation; the usual sweeps over
+the fine springs then clean up what the coarse levels could not see.
+
+A coarse constraint or block stays active only while every structural
+spring inside it is alive. Springs that break or are cut switch off just
+the constraints and blocks around them, so torn pieces are not pulled
+back together; the hierarchy is rebuilt from scratch only when the cloth
+is replaced or its springs are compacted.
+"""
+import numpy as np
+
+from physics.projection import color_constraints, project
+
+
+def _nodes(size, stride):
+    """Every stride-th row or column index, plus the last one"""
+    nodes = np.arange(0, size, stride)
+    return nodes if nodes[-1] == size - 1 else np.append(nodes, size - 1)
+
+
+def _blocks(coords, nodes, shared=True):
+    """(coordinate index, block) pairs of the blocks whose node span holds each coordinate.
+
+    Blocks are closed spans [nodes[k], nodes[k + 1]], so with shared a
+    coordinate on an inner node line belongs to the blocks on both sides.
+    """
+    block = np.clip(np.searchsorted(nodes, coords, side="right") - 1, 0, len(nodes) - 2)
+    which = np.arange(len(coords))
+    if not shared:
+        return which, block
+    edge = (coords == nodes[block]) & (block > 0)
+    return np.concatenate([which, which[edge]]), np.concatenate([block, block[edge] - 1])
+
+
+def _rect_sums(table, r0, r1, c0, c1):
+    """Sums over [r0, r1) x [c0, c1) from a zero-padded 2D prefix sum table"""
+    return table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0]
+
+
+def _prefix(counts):
+    table = np.zeros((counts.shape[0] + 1, counts.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(counts, axis=0), axis=1, out=table[1:, 1:])
+    return table
+
+
+class _Level:
+    """Nodes, constraints and prolongation weights of one coarse level"""
+
+    def __init__(self, stride, grid_w, grid_h, h_rest, v_rest, h_broken, v_broken):
+        rows, cols = _nodes(grid_h, stride), _nodes(grid_w, stride)
+        a, b = len(rows), len(cols)
+        self.stride = stride
+        self.rows, self.cols = rows, cols
+        self.nodes = (rows[:, None] * grid_w + cols[None, :]).ravel()
+        node = np.arange(a * b).reshape(a, b)
+
+        # Row and column edges, then both diagonals of every block
+        self.i1 = np.concatenate([node[:, :-1].ravel(), node[:-1, :].ravel(),
+                                  node[:-1, :-1].ravel(), node[:-1, 1:].ravel()])
+        self.i2 = np.concatenate([node[:, 1:].ravel(), node[1:, :].ravel(),
+                                  node[1:, 1:].ravel(), node[1:, :-1].ravel()])
+        h_sums = np.concatenate([np.zeros((grid_h, 1)), np.cumsum(h_rest, axis=1)], axis=1)
+        v_sums = np.concatenate([np.zeros((1, grid_w)), np.cumsum(v_rest, axis=0)], axis=0)
+        h_len = h_sums[rows][:, cols[1:]] - h_sums[rows][:, cols[:-1]]
+        v_len = v_sums[rows[1:]][:, cols] - v_sums[rows[:-1]][:, cols]
+        diagonal = np.hypot(h_len[:-1], v_len[:, :-1]).ravel()
+        self.rest_length = np.concatenate([h_len.ravel(), v_len.ravel(), diagonal, diagonal])
+        self.order, self.starts = color_constraints(self.i1, self.i2, a * b)
+
+        # Bilinear weights of the four corners of each fine particle's block
+        r, c = np.divmod(np.arange(grid_w * grid_h), grid_w)
+        k = _blocks(r, rows, shared=False)[1]
+        m = _blocks(c, cols, shared=False)[1]
+        u = (c - cols[m]) / (cols[m + 1] - cols[m])
+        v = (r - rows[k]) / (rows[k + 1] - rows[k])
+        self.block = k * (b - 1) + m
+        self.corners = np.stack([node[k, m], node[k, m + 1], node[k + 1, m], node[k + 1, m + 1]], axis=1)
+        self.weights = np.stack([(1 - u) * (1 - v), u * (1 - v), (1 - u) * v, u * v], axis=1)
+
+        # Broken structural springs inside each edge and block
+        h_table, v_table = _prefix(h_broken), _prefix(v_broken)
+        k, m = np.arange(a)[:, None], np.arange(b - 1)[None, :]
+        self.h_edges = _rect_sums(h_table, rows[k], rows[k] + 1, cols[m], cols[m + 1]) == 0
+        k, m = np.arange(a - 1)[:, None], np.arange(b)[None, :]
+        self.v_edges = _rect_sums(v_table, rows[k], rows[k + 1], cols[m], cols[m] + 1) == 0
+        k, m = np.arange(a - 1)[:, None], np.arange(b - 1)[None, :]
+        self.blocks = ((_rect_sums(h_table, rows[k], rows[k + 1] + 1, cols[m], cols[m + 1]) == 0)
+                       & (_rect_sums(v_table, rows[k], rows[k + 1], cols[m], cols[m + 1] + 1) == 0))
+        self._row_node = np.full(grid_h, -1)
+        self._row_node[rows] = np.arange(a)
+        self._col_node = np.full(grid_w, -1)
+        self._col_node[cols] = np.arange(b)
+
+    def __len__(self):
+        return len(self.i1)
+
+    def activate(self, stiffness):
+        """Refresh constraint stiffness and prolongation weights from the active flags"""
+        blocks = self.blocks.ravel()
+        active = np.concatenate([self.h_edges.ravel(), self.v_edges.ravel(), blocks, blocks])
+        self.stiffness = np.where(active, stiffness, 0.0)
+        self.prolongation = self.weights * blocks[self.block][:, None]
+        return len(active) - int(np.count_nonzero(active))
+
+    def break_links(self, h_rows, h_cols, v_rows, v_cols):
+        """Switch off the edges and blocks holding newly broken horizontal/vertical springs"""
+        rows, cols = self.rows, self.cols
+        # A horizontal spring lies in one block column and on a node row or between two
+        m = _blocks(h_cols, cols, shared=False)[1]
+        on_row = self._row_node[h_rows]
+        self.h_edges[on_row[on_row >= 0], m[on_row >= 0]] = False
+        which, k = _blocks(h_rows, rows)
+        self.blocks[k, m[which]] = False
+
+        k = _blocks(v_rows, rows, shared=False)[1]
+        on_col = self._col_node[v_cols]
+        self.v_edges[k[on_col >= 0], on_col[on_col >= 0]] = False
+        which, m = _blocks(v_cols, cols)
+        self.blocks[k[which], m] = False
+
+
+class Multigrid:
+    """Coarse-to-fine constraint projection settings and hierarchy for ClothSystem.
+
+    levels caps the number of coarse levels (None builds strides 2, 4, 8,
+    ... until a level spans the cloth). sweeps stretch-only Gauss-Seidel
+    sweeps run on each level per substep, correcting stiffness of the
+    error each time. Only cloths built on a full create_cloth grid get a
+    hierarchy; other shapes run the plain "pbd" sweeps. stats holds the
+    level count, coarse constraints, how many are switched off by broken
+    springs and how often the hierarchy was rebuilt or patched.
+    """
+
+    def __init__(self, levels=None, sweeps=2, stiffness=1.0, compiled=None):
+        self.max_levels = levels
+        self.sweeps = sweeps
+        self.stiffness = stiffness
+        self.compiled = compiled  # None: use numba when installed
+        self.levels = []
+        self.stats = {"levels": 0, "constraints": 0, "inactive": 0, "rebuilds": 0, "local_updates": 0}
+        self._springs = None
+        self._key = None
+        self._removed_seen = 0
+        self._slot_link = np.zeros(0, dtype=np.int64)
+        self._grid = (0, 0)
+
+    def settings(self):
+        """Constructor arguments, to rebuild the same settings elsewhere"""
+        return {"levels": self.max_levels, "sweeps": self.sweeps, "stiffness": self.stiffness,
+                "compiled": self.compiled}
+
+    def apply(self, x, y, inv_mass, cloth_system):
+        """Project the coarse levels and prolong their corrections into x and y in place"""
+        self._sync(cloth_system)
+        if not self.levels:
+            return
+        movable = inv_mass > 0
+        for level in self.levels:
+            nodes = level.nodes
+            xc, yc = x[nodes], y[nodes]
+            x0, y0 = xc.copy(), yc.copy()
+            for _ in range(self.sweeps):
+                project(xc, yc, inv_mass[nodes], level.i1, level.i2, level.rest_length, level.stiffness,
+                        level.order, level.starts, self.compiled, stretch_only=True)
+            dx, dy = xc - x0, yc - y0
+            x += np.where(movable, (level.prolongation * dx[level.corners]).sum(axis=1), 0.0)
+            y += np.where(movable, (level.prolongation * dy[level.corners]).sum(axis=1), 0.0)
+
+    def _sync(self, cloth_system):
+        """Rebuild for a new cloth or layout; otherwise switch off what broke since the last call"""
+        springs = cloth_system.springs
+        key = (springs.layout_version, len(cloth_system.flat_particles), cloth_system.grid_w, cloth_system.grid_h)
+        if springs is not self._springs or key != self._key:
+            self._build(cloth_system)
+            self._springs = springs
+            self._key = key
+            self._removed_seen = len(springs.removed)
+        elif len(springs.removed) > self._removed_seen:
+            self._break(springs.removed[self._removed_seen:])
+            self._removed_seen = len(springs.removed)
+
+    def _build(self, cloth_system):
+        self.levels = []
+        self.stats["rebuilds"] += 1
+        grid_w, grid_h = cloth_system.grid_w, cloth_system.grid_h
+        n = len(cloth_system.flat_particles)
+        if cloth_system.grid_index is not None or grid_w * grid_h != n or min(grid_w, grid_h) < 3:
+            self._update_stats()
+            return
+
+        # Spring slot of each horizontal (r, c)-(r, c + 1) and vertical (r, c)-(r + 1, c) link
+        arrays = cloth_system.springs.arrays()
+        live = np.flatnonzero(arrays.alive)
+        a, b = arrays.i1[live], arrays.i2[live]
+        keys = np.minimum(a, b) * n + np.maximum(a, b)
+        order = np.argsort(keys)
+        sorted_keys, sorted_slots = keys[order], live[order]
+        flat = np.arange(n).reshape(grid_h, grid_w)
+        link_keys = np.concatenate([(flat[:, :-1] * n + flat[:, 1:]).ravel(), (flat[:-1] * n + flat[1:]).ravel()])
+        pos = np.minimum(np.searchsorted(sorted_keys, link_keys), max(len(sorted_keys) - 1, 0))
+        found = sorted_keys[pos] == link_keys if len(sorted_keys) else np.zeros(len(link_keys), dtype=bool)
+        slots = np.where(found, sorted_slots[pos] if len(sorted_keys) else 0, -1)
+        self._slot_link = np.full(len(arrays.alive), -1, dtype=np.int64)
+        self._slot_link[slots[found]] = np.flatnonzero(found)
+        self._grid = (grid_w, grid_h)
+
+        rest = np.where(found, arrays.rest_length[np.maximum(slots, 0)], 0.0)
+        num_h = grid_h * (grid_w - 1)
+        h_rest, v_rest = rest[:num_h].reshape(grid_h, grid_w - 1), rest[num_h:].reshape(grid_h - 1, grid_w)
+        h_broken, v_broken = ~found[:num_h].reshape(h_rest.shape), ~found[num_h:].reshape(v_rest.shape)
+
+        stride = 2
+        while stride < max(grid_w, grid_h) - 1 and (self.max_levels is None or len(self.levels) < self.max_levels):
+            self.levels.append(_Level(stride, grid_w, grid_h, h_rest, v_rest, h_broken, v_broken))
+            stride *= 2
+        self.levels.reverse()  # Coarsest first
+        self._update_stats()
+
+    def _break(self, slots):
+        if not self.levels:
+            return
+        links = self._slot_link[np.asarray(slots, dtype=np.int64)]
+        links = links[links >= 0]
+        if not len(links):
+            return
+        grid_w, grid_h = self._grid
+        num_h = grid_h * (grid_w - 1)
+        h_rows, h_cols = np.divmod(links[links < num_h], grid_w - 1)
+        v_rows, v_cols = np.divmod(links[links >= num_h] - num_h, grid_w)
+        for level in self.levels:
+            level.break_links(h_rows, h_cols, v_rows, v_cols)
+        self.stats["local_updates"] += 1
+        self._update_stats()
+
+    def _update_stats(self):
+        inactive = sum(level.activate(self.stiffness) for level in self.levels)
+        self.stats.update(levels=len(self.levels), constraints=sum(len(level) for level in self.levels),
+                          inactive=inactive)
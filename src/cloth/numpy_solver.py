@@ -0,0 +1,233 @@
+import numpy as np
+
+
+class ActiveSprings:
+    """Spring arrays restricted to some slots (all slots when slots is None)"""
+
+    def __init__(self, arrays, slots=None):
+        if slots is None:
+            self.slots = None
+            self.i1, self.i2 = arrays.i1, arrays.i2
+            self.rest_length, self.stiffness = arrays.rest_length, arrays.stiffness
+            self.max_stretch, self.alive = arrays.max_stretch, arrays.alive
+        else:
+            self.slots = slots
+            self.i1, self.i2 = arrays.i1[slots], arrays.i2[slots]
+            self.rest_length, self.stiffness = arrays.rest_length[slots], arrays.stiffness[slots]
+            self.max_stretch, self.alive = arrays.max_stretch[slots], arrays.alive[slots]
+
+
+class NumpySolver:
+    """Structure-of-arrays solver backend for ClothSystem.
+
+    Particles are packed into contiguous position, previous-position and
+    force arrays and springs into index, rest-length, stiffness and
+    breaking threshold arrays, in the cloth's precision. Each iteration mirrors the object path
+    (springs, then particles, then boundary constraints) but runs as a
+    handful of vectorized passes instead of one method call per spring
+    and particle.
+
+    Between consecutive steps the arrays are the source of truth: only the
+    grabbed particle (ClothSystem.grabbed) and particles reported through
+    ClothSystem.particles_changed() are read back from their objects. A new
+    cloth, or a step taken by another solver, reloads every particle.
+    """
+
+    def __init__(self, cloth_system, epsilon=1e-6, max_vel=10.0):
+        self.cloth = cloth_system
+        self.epsilon = epsilon
+        self.max_vel = max_vel
+
+        # Particle list the arrays were packed from, used to detect a new cloth
+        self.flat_particles = None
+        self._pack_particles()
+        self._synced_step = None  # cloth.steps after this solver's last step
+        self._changed = None  # Particles to reread before the next step; None rereads all
+
+    def _pack_particles(self):
+        """Allocate particle arrays for the cloth's flat particle list"""
+        self.flat_particles = self.cloth.flat_particles
+        n = len(self.flat_particles)
+        dtype = self.cloth.dtype
+        self.x = np.zeros(n, dtype=dtype)
+        self.y = np.zeros(n, dtype=dtype)
+        self.px = np.zeros(n, dtype=dtype)
+        self.py = np.zeros(n, dtype=dtype)
+        self.fx = np.zeros(n, dtype=dtype)
+        self.fy = np.zeros(n, dtype=dtype)
+        self.mass = np.fromiter((p.mass for p in self.flat_particles), dtype=dtype, count=n)
+        self.pinned = np.zeros(n, dtype=bool)
+        self.fixed = np.zeros(n, dtype=bool)  # Pinned, plus frozen during a step
+
+    def invalidate(self, indices=None):
+        """Reread the given particles (all when None) from their objects before the next step"""
+        if indices is None or self._changed is None:
+            self._changed = None
+        else:
+            self._changed.update(indices)
+
+    def _sync_in(self):
+        """Read particle state that may have been changed outside the solver"""
+        cloth = self.cloth
+        if cloth.flat_particles is not self.flat_particles:
+            self._pack_particles()
+            self._changed = None
+        if self._synced_step != cloth.steps - 1:
+            # The particles were last moved by someone else
+            self._changed = None
+
+        flat = self.flat_particles
+        if self._changed is None:
+            n = len(flat)
+            self.x[:] = np.fromiter((p.x for p in flat), dtype=float, count=n)
+            self.y[:] = np.fromiter((p.y for p in flat), dtype=float, count=n)
+            self.px[:] = np.fromiter((p.px for p in flat), dtype=float, count=n)
+            self.py[:] = np.fromiter((p.py for p in flat), dtype=float, count=n)
+            self.fx[:] = np.fromiter((p.fx for p in flat), dtype=float, count=n)
+            self.fy[:] = np.fromiter((p.fy for p in flat), dtype=float, count=n)
+            self.pinned[:] = np.fromiter((p.fixed for p in flat), dtype=bool, count=n)
+        else:
+            # Otherwise only the grabbed particle is moved from outside, by the mouse
+            changed = self._changed
+            if cloth.grabbed is not None:
+                changed.add(cloth.grabbed)
+            for i in changed:
+                p = flat[i]
+                self.x[i], self.y[i], self.px[i], self.py[i] = p.x, p.y, p.px, p.py
+                self.fx[i], self.fy[i], self.pinned[i] = p.fx, p.fy, p.fixed
+        self._changed = set()
+        self.fixed[:] = self.pinned
+
+    def _sync_out(self, frozen=None):
+        """Write the solved positions back to the particle objects (skipping frozen ones).
+
+        Forces are left alone: the objects' are zero between steps and the
+        arrays' are cleared by every integration pass.
+        """
+        if frozen is None:
+            state = zip(self.flat_particles, self.x.tolist(), self.y.tolist(),
+                        self.px.tolist(), self.py.tolist())
+        else:
+            moving = np.flatnonzero(~frozen)
+            flat = self.flat_particles
+            state = zip([flat[i] for i in moving.tolist()], self.x[moving].tolist(), self.y[moving].tolist(),
+                        self.px[moving].tolist(), self.py[moving].tolist())
+        for p, x, y, px, py in state:
+            p.x = x
+            p.y = y
+            p.px = px
+            p.py = py
+        self._synced_step = self.cloth.steps
+
+    def step(self, num_iterations, gravity, damping, frozen=None):
+        """Run num_iterations solver passes over the packed arrays.
+
+        frozen is an optional particle mask (sleeping islands): those
+        particles are held like fixed ones and springs between two of them
+        are skipped.
+        """
+        stage = self.cloth.profiler.stage
+        with stage("sync"):
+            self._sync_in()
+        active = self._active_springs(frozen)
+        for _ in range(num_iterations):
+            with stage("springs"):
+                self._apply_springs(active)
+            with stage("particles"):
+                self._integrate(gravity, damping)
+            with stage("constraints"):
+                self._apply_constraints()
+        self._collide()
+        with stage("sync"):
+            self._sync_out(frozen)
+
+    def _collide(self):
+        """Resolve self-collisions on the packed positions, if the cloth has them enabled"""
+        collision = self.cloth.self_collision
+        if collision is not None:
+            with self.cloth.profiler.stage("collision"):
+                collision.apply(self.x, self.y, np.where(self.fixed, 0.0, 1.0 / self.mass), self.cloth.springs)
+
+    def _active_springs(self, frozen):
+        """Spring arrays to solve, and frozen particles marked fixed for this step"""
+        arrays = self.cloth.springs.arrays()
+        if frozen is None:
+            return ActiveSprings(arrays)
+        self.fixed |= frozen
+        return ActiveSprings(arrays, np.flatnonzero(arrays.alive & ~(frozen[arrays.i1] & frozen[arrays.i2])))
+
+    def _apply_springs(self, arrays):
+        """Accumulate spring forces and drop springs stretched past their threshold"""
+        springs = self.cloth.springs
+        i1, i2 = arrays.i1, arrays.i2
+        dx = self.x[i2] - self.x[i1]
+        dy = self.y[i2] - self.y[i1]
+        dist = np.hypot(dx, dy)
+
+        # Tombstoned slots stay in the arrays until compaction; alive masks them out
+        broken = arrays.alive & (dist > arrays.max_stretch)
+        if broken.any():
+            slots = springs.slots
+            hit = np.flatnonzero(broken)
+            arrays.alive[hit] = False
+            if arrays.slots is not None:
+                hit = arrays.slots[hit]
+            for k in hit.tolist():
+                slots[k].broken = True
+                springs.remove(slots[k])
+
+        # Springs with coincident endpoints contribute no force
+        inactive = ~arrays.alive | (dist < self.epsilon)
+        scale = (dist - arrays.rest_length) * arrays.stiffness / np.where(inactive, 1.0, dist)
+        scale[inactive] = 0.0
+        fx = dx * scale
+        fy = dy * scale
+
+        n = len(self.x)
+        self.fx += np.bincount(i1, weights=fx, minlength=n)
+        self.fx -= np.bincount(i2, weights=fx, minlength=n)
+        self.fy += np.bincount(i1, weights=fy, minlength=n)
+        self.fy -= np.bincount(i2, weights=fy, minlength=n)
+
+    def _integrate(self, gravity, damping):
+        """Verlet step with gravity, damping and velocity clamping"""
+        self.fy += gravity * self.mass
+
+        vel_x = (self.x - self.px) * damping + self.fx
+        vel_y = (self.y - self.py) * damping + self.fy
+        speed = np.hypot(vel_x, vel_y)
+        fast = speed > self.max_vel
+        if fast.any():
+            vel_x[fast] = vel_x[fast] / speed[fast] * self.max_vel
+            vel_y[fast] = vel_y[fast] / speed[fast] * self.max_vel
+
+        # Fixed particles neither move nor accumulate forces
+        vel_x[self.fixed] = 0.0
+        vel_y[self.fixed] = 0.0
+        free = ~self.fixed
+        self.px = np.where(free, self.x, self.px)
+        self.py = np.where(free, self.y, self.py)
+        self.x += vel_x
+        self.y += vel_y
+        self.fx[:] = 0.0
+        self.fy[:] = 0.0
+
+    def _apply_constraints(self):
+        """Vectorized version of ClothSystem._apply_constraints"""
+        buffer = 5
+        width = self.cloth.WIDTH
+        height = self.cloth.HEIGHT
+        x, y, px, py = self.x, self.y, self.px, self.py
+        free = ~self.fixed
+
+        left = free & (x < buffer)
+        x[left] = buffer
+        px[left] = x[left] + (x[left] - px[left]) * 0.4
+
+        right = free & ~left & (x > width - buffer)
+        x[right] = width - buffer
+        px[right] = x[right] + (x[right] - px[right]) * 0.4
+
+        floor = free & (y > height - buffer)
+        y[floor] = height - buffer
+        px[floor] = x[floor] + (y[floor] - py[floor]) * 0.2
@@ -1,9 +1,11 @@
-import pygame
 import math
 import random  # Import random for initial displacement
 
 class Particle:
-    def __init__(self, x, y, fixed=False):
+    # No per-instance __dict__: large cloths hold hundreds of thousands of these
+    __slots__ = ("x", "y", "px", "py", "fx", "fy", "fixed", "mass")
+
+    def __init__(self, x, y, fixed=False, rng=None):
         self.x = x
         self.y = y
         self.px = x  # previous x position
@@ -14,9 +16,11 @@ class Particle:
         self.mass = 1.0
         
         # Add a small initial displacement to avoid grid-like appearance
+        # (pass a seeded random.Random as rng for reproducible runs)
         if not fixed:
-            self.px += (random.random() * 2 - 1) * 0.1
-            self.py += (random.random() * 2 - 1) * 0.1
+            rng = rng or random
+            self.px += (rng.random() * 2 - 1) * 0.1
+            self.py += (rng.random() * 2 - 1) * 0.1
 
     def apply_force(self, fx, fy):
         if not self.fixed:
@@ -56,5 +60,10 @@ class Particle:
         self.fx = 0
         self.fy = 0
     
+    def move(self, x, y):
+        """Put the particle at (x, y), e.g. under the mouse while dragged"""
+        self.x = x
+        self.y = y
+
     def pos(self):
         return (int(self.x), int(self.y))
\ No newline at end of file
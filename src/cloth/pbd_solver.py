@@ -0,0 +1,146 @@
+import numpy as np
+
+from physics.projection import color_constraints, constraint_error, project
+from .numpy_solver import NumpySolver
+
+
+class ProjectionSolver(NumpySolver):
+    """Position-based solver backend for ClothSystem ("pbd").
+
+    Each update runs frame_substeps Verlet substeps, the same amount of
+    simulated time as the force-based solvers' iterations. After each
+    substep every spring is projected as a distance constraint with
+    num_iterations graph-colored Gauss-Seidel sweeps (see
+    physics.projection). Per-sweep stiffness is derived from the iteration
+    count so the converged stiffness stays the same when num_iterations
+    drops. Given AdaptiveIterations settings, each substep instead sweeps
+    until the stretch error is within tolerance. The RMS error before the
+    first sweep and after each sweep of the last substep is kept in
+    residuals, and the sweeps run per substep in iterations. With
+    ClothSystem.multigrid set, each substep first projects the coarse
+    levels of its hierarchy (see cloth.multigrid).
+    """
+
+    def __init__(self, cloth_system, frame_substeps=6, stiffness_scale=4.0, compiled=None):
+        super().__init__(cloth_system)
+        self.frame_substeps = frame_substeps
+        self.stiffness_scale = stiffness_scale  # spring_constant -> fraction of error corrected
+        self.compiled = compiled  # None: use numba when installed
+        self.residuals = []
+        self.iterations = 0.0  # mean sweeps per substep in the last step
+        self.max_error = 0.0
+        self.rms_error = 0.0
+
+        self._coloring_key = None
+        self._stiffness_key = None
+        self.order = None
+        self.color_starts = None
+        self.stiffness = None
+        self.weight = None
+
+    @property
+    def num_colors(self):
+        return 0 if self.color_starts is None else len(self.color_starts) - 1
+
+    def coloring(self):
+        """(order, starts) of the current coloring, or None if it is stale"""
+        springs = self.cloth.springs
+        if self._coloring_key != (id(springs), springs.layout_version, len(self.cloth.flat_particles)):
+            return None
+        return self.order, self.color_starts
+
+    def set_coloring(self, order, starts):
+        """Adopt a coloring of the current spring slots (e.g. from a checkpoint)"""
+        springs = self.cloth.springs
+        self.order = np.asarray(order, dtype=np.int64)
+        self.color_starts = np.asarray(starts, dtype=np.int64)
+        self._coloring_key = (id(springs), springs.layout_version, len(self.cloth.flat_particles))
+        self._stiffness_key = None
+
+    def _refresh_constraints(self, num_iterations):
+        """Recolor after a layout change and refresh per-sweep stiffness"""
+        springs = self.cloth.springs
+        arrays = springs.arrays()
+        coloring_key = (id(springs), springs.layout_version, len(self.x))
+        if coloring_key != self._coloring_key:
+            self.order, self.color_starts = color_constraints(arrays.i1, arrays.i2, len(self.x), arrays.alive)
+            self._coloring_key = coloring_key
+
+        # Removed springs keep their color slot with zero stiffness
+        stiffness_key = (coloring_key, springs.version, num_iterations)
+        if stiffness_key != self._stiffness_key:
+            target = np.minimum(1.0, arrays.stiffness * self.stiffness_scale)
+            per_sweep = 1.0 - (1.0 - target) ** (1.0 / max(num_iterations, 1))
+            self.stiffness = np.where(arrays.alive, per_sweep, 0.0)
+            self.weight = np.where(arrays.alive, target, 0.0)
+            self._stiffness_key = stiffness_key
+
+    def step(self, num_iterations, gravity, damping, adaptive=None, frozen=None):
+        """Run frame_substeps substeps of integration plus constraint sweeps.
+
+        Each substep runs num_iterations sweeps, or with adaptive
+        (AdaptiveIterations) as many as it takes to meet its tolerance.
+        Particles in the frozen mask are held like fixed ones.
+        """
+        stage = self.cloth.profiler.stage
+        with stage("sync"):
+            self._sync_in()
+        if frozen is not None:
+            self.fixed |= frozen
+        with stage("coloring"):
+            self._refresh_constraints(num_iterations)
+        arrays = self.cloth.springs.arrays()
+        i1, i2, rest_length = arrays.i1, arrays.i2, arrays.rest_length
+        inv_mass = np.where(self.fixed, 0.0, 1.0 / self.mass)
+        if adaptive is None:
+            low = high = num_iterations
+        else:
+            low, high = adaptive.min_iterations, adaptive.max_iterations
+
+        multigrid = self.cloth.multigrid
+        sweeps = 0
+        for substep in range(self.frame_substeps):
+            # Without a tolerance to test, error is only measured on the last substep
+            track = adaptive is not None or substep == self.frame_substeps - 1
+            with stage("particles"):
+                self._integrate(gravity, damping)
+            if multigrid is not None:
+                with stage("multigrid"):
+                    multigrid.apply(self.x, self.y, inv_mass, self.cloth)
+            with stage("projection"):
+                if track:
+                    errors = [constraint_error(self.x, self.y, i1, i2, rest_length, self.weight)]
+                done = 0
+                while done < high:
+                    if adaptive is not None and done >= low and adaptive.converged(*errors[-1]):
+                        break
+                    project(self.x, self.y, inv_mass, i1, i2, rest_length, self.stiffness,
+                            self.order, self.color_starts, self.compiled)
+                    done += 1
+                    if track:
+                        errors.append(constraint_error(self.x, self.y, i1, i2, rest_length, self.weight))
+            sweeps += done
+            with stage("constraints"):
+                self._break_springs()
+                self._apply_constraints()
+
+        self.residuals = [rms for _, rms in errors]
+        self.max_error, self.rms_error = errors[-1]
+        self.iterations = sweeps / self.frame_substeps
+        self._collide()
+        with stage("sync"):
+            self._sync_out(frozen)
+
+    def _break_springs(self):
+        """Drop springs still stretched past their threshold after projection"""
+        springs = self.cloth.springs
+        arrays = springs.arrays()
+        dist = np.hypot(self.x[arrays.i2] - self.x[arrays.i1], self.y[arrays.i2] - self.y[arrays.i1])
+        broken = arrays.alive & (dist > arrays.max_stretch)
+        if broken.any():
+            slots = springs.slots
+            for k in np.flatnonzero(broken).tolist():
+                slots[k].broken = True
+                springs.remove(slots[k])
+            self.stiffness[broken] = 0.0
+            self.weight[broken] = 0.0
@@ -0,0 +1,172 @@
+"""Per-stage frame profiling.
+
+Code under measurement wraps each stage in a with-block:
+
+    with profiler.stage("springs"):
+        ...
+
+Stage times are summed over a frame and counters (live springs, springs
+broken, triangles drawn) hold per-frame values; end_frame() closes the
+frame and pushes both into rolling windows that give p50/p95/p99. A
+disabled profiler hands out one shared no-op stage, so instrumentation
+left in place costs a method call and an attribute test per stage.
+"""
+import csv
+import json
+import time
+
+import numpy as np
+
+# Stages and counters the simulation, renderer and main loop report, in
+# the column order of CSV exports
+STAGES = ("frame", "events", "physics", "islands", "particles", "springs", "constraints", "sync", "coloring",
+          "multigrid", "projection", "collision", "recorder", "render", "mesh", "shading", "fill", "ui",
+          "flip", "wait")
+COUNTERS = ("live_springs", "broken_springs", "collision_pairs", "contacts", "triangles")
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Timer adding its elapsed time to the profiler's current frame"""
+
+    __slots__ = ("frame", "name", "start")
+
+    def __init__(self, frame, name):
+        self.frame = frame
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        frame = self.frame
+        frame[self.name] = frame.get(self.name, 0) + time.perf_counter_ns() - self.start
+        return False
+
+
+class Profiler:
+    """Rolling per-stage timings and per-frame counters.
+
+    window is the number of frames the percentiles are taken over. export
+    is an optional path every frame is written to as it ends: one JSON
+    object per line, or CSV if the path ends in .csv. CSV columns are fixed
+    up front from STAGES and COUNTERS; other names only reach JSON lines.
+    """
+
+    def __init__(self, enabled=False, window=600, export=None):
+        self.enabled = enabled
+        self.window = window
+        self.export = export
+        self.frames = 0
+        self._frame = {}
+        self._counters = {}
+        self._stages = {}
+        self._history = {}
+        self._last_frame = None
+        self._file = None
+        self._writer = None
+        if export is not None:
+            # Line buffered, so a crash loses at most the frame being written
+            self._file = open(export, "w", buffering=1, newline="" if export.endswith(".csv") else None)
+            if export.endswith(".csv"):
+                fields = ["frame"] + [name + "_ms" for name in STAGES] + list(COUNTERS)
+                self._writer = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+                self._writer.writeheader()
+
+    @property
+    def exporting(self):
+        return self.export is not None
+
+    def stage(self, name):
+        """Context manager timing a stage of the current frame"""
+        if not self.enabled:
+            return _NULL_STAGE
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self._frame, name)
+        return stage
+
+    def count(self, name, value):
+        """Set a counter for the current frame"""
+        if self.enabled:
+            self._counters[name] = value
+
+    def add(self, name, value=1):
+        """Add to a counter for the current frame"""
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def end_frame(self):
+        """Close the current frame: record its stages, counters and total time"""
+        now = time.perf_counter_ns()
+        last = self._last_frame
+        self._last_frame = now
+        if not self.enabled:
+            return
+        frame = self._frame
+        if last is not None:
+            frame["frame"] = now - last
+        row = {"frame": self.frames}
+        for name, ns in frame.items():
+            self._push(name, ns / 1e6)
+            row[name + "_ms"] = ns / 1e6
+        for name, value in self._counters.items():
+            self._push(name, value)
+            row[name] = value
+        if self._writer is not None:
+            self._writer.writerow(row)
+        elif self._file is not None:
+            self._file.write(json.dumps(row) + "\n")
+        # Stages keep a reference to the frame dict, so clear it in place
+        frame.clear()
+        self._counters = {}
+        self.frames += 1
+
+    def _push(self, name, value):
+        history = self._history.get(name)
+        if history is None:
+            history = self._history[name] = [np.zeros(self.window), 0]
+        values, count = history
+        values[count % self.window] = value
+        history[1] = count + 1
+
+    def _recent(self, name):
+        values, count = self._history[name]
+        return values[:min(count, self.window)]
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        """Percentiles of a stage (ms) or counter over the rolling window"""
+        if name not in self._history:
+            return tuple(0.0 for _ in q)
+        return tuple(np.percentile(self._recent(name), q).tolist())
+
+    def summary(self):
+        """Percentiles and means over the window: {"stages": {...} in ms, "counters": {...}}"""
+        result = {"stages": {}, "counters": {}}
+        for name in self._history:
+            recent = self._recent(name)
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99)).tolist()
+            group = "stages" if name == "frame" or name in self._stages else "counters"
+            result[group][name] = {"p50": p50, "p95": p95, "p99": p99, "mean": float(recent.mean())}
+        return result
+
+    def close(self):
+        """Finish the export file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
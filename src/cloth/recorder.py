@@ -0,0 +1,335 @@
+"""Streaming trajectory recording of a ClothSystem.
+
+A TrajectoryRecorder attached as ClothSystem.recorder is handed every
+frame at the end of update(). The simulation thread only copies the
+positions and diffs the live springs; a background thread quantizes,
+delta-encodes, compresses and writes the frames in chunks. The queue
+between them is bounded, so a writer that falls behind slows the
+simulation down instead of growing memory.
+
+The log is a prefix followed by records, each a fixed record prefix, a
+JSON header and a zlib payload:
+
+    magic "CLOTHTR\\0" | uint32 version
+    record: 4-byte kind | uint32 header length | uint32 payload length
+    b"TOPO": spring endpoints (int32 i1, i2); a spring's ID is its row here
+    b"CHNK": up to chunk_frames frames: the first frame's quantized
+             positions, per-frame deltas, and the IDs of springs removed in
+             each frame as a sparse event stream
+
+Positions are stored as integer multiples of precision, so the deltas
+reconstruct them exactly (to within precision / 2 of the simulated ones).
+
+    cloth_system.recorder = TrajectoryRecorder("run.traj")
+    ...
+    cloth_system.recorder.close()
+    reader = TrajectoryReader("run.traj")
+    positions = reader.frame(120)
+"""
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+MAGIC = b"CLOTHTR\0"
+VERSION = 1
+_PREFIX = struct.Struct("<8sI")
+_RECORD = struct.Struct("<4sII")
+_TOPOLOGY = b"TOPO"
+_CHUNK = b"CHNK"
+_STOP = object()
+
+
+class TrajectoryError(ValueError):
+    """Raised for files that are not readable trajectory logs"""
+
+
+def _positions(cloth_system):
+    """This frame's positions, from the solver arrays when they are current"""
+    solver = {"numpy": cloth_system._numpy_solver, "pbd": cloth_system._projection_solver}.get(cloth_system.solver)
+    if solver is not None and solver.flat_particles is cloth_system.flat_particles:
+        # Right after a step these match the particle objects, without a Python-level pass
+        return np.stack([solver.x, solver.y], axis=1)
+    return cloth_system.positions()
+
+
+class TrajectoryRecorder:
+    """Write each frame of a ClothSystem to a chunked, compressed log.
+
+    chunk_frames frames go into each compressed chunk; queue_chunks is how
+    many finished chunks may wait for the writer before record() blocks.
+    Spring IDs index the latest topology record; one is written at the
+    start and whenever springs are added or the cloth is replaced, while
+    compaction keeps the IDs of the surviving springs.
+    """
+
+    def __init__(self, path, precision=1 / 64, chunk_frames=60, queue_chunks=4, level=1):
+        self.path = path
+        self.precision = precision
+        self.chunk_frames = chunk_frames
+        self.level = level
+        self.frames = 0
+        self.blocked = 0.0  # seconds record() spent waiting on a full queue
+        self.error = None
+        self._file = open(path, "wb")
+        self._file.write(_PREFIX.pack(MAGIC, VERSION))
+        self._queue = queue.Queue(maxsize=queue_chunks)
+        self._thread = threading.Thread(target=self._write_loop, name="trajectory-writer", daemon=True)
+        self._thread.start()
+
+        self._pending = []
+        self._pending_events = []
+        self._first_frame = 0
+        self._topology = -1
+        self._springs = None
+        self._arrays = None
+        self._alive = None
+        self._ids = None
+        self._num_particles = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, cloth_system):
+        """Add the current frame of cloth_system to the log"""
+        if self.error is not None:
+            raise self.error
+        positions = _positions(cloth_system)
+        removed, topology_changed = self._track_springs(cloth_system)
+        if topology_changed or len(positions) != self._num_particles:
+            # A chunk holds one particle count and one set of spring IDs
+            self._flush()
+            if topology_changed:
+                self._put((_TOPOLOGY, self._topology_record()))
+            self._num_particles = len(positions)
+
+        self._pending.append(positions)
+        self._pending_events.append(removed)
+        self.frames += 1
+        if len(self._pending) >= self.chunk_frames:
+            self._flush()
+
+    def _track_springs(self, cloth_system):
+        """IDs of the springs removed since the last frame, and whether IDs were reset"""
+        springs = cloth_system.springs
+        arrays = springs.arrays()
+        removed = np.zeros(0, dtype=np.int64)
+        if arrays is not self._arrays:
+            old = self._arrays
+            compacted = (springs is self._springs and old is not None
+                         and len(springs.slots) == np.count_nonzero(old.alive))
+            self._arrays = arrays
+            if not compacted:
+                # New cloth or added springs: number the live springs afresh
+                live = arrays.alive
+                self._springs = springs
+                self._ids = np.full(len(live), -1, dtype=np.int64)
+                self._ids[live] = np.arange(np.count_nonzero(live))
+                self._alive = live.copy()
+                self._topology += 1
+                self._topology_arrays = (arrays.i1[live], arrays.i2[live])
+                return removed, True
+            # The old arrays saw every removal up to the compaction
+            removed = self._ids[self._alive & ~old.alive]
+            self._ids = self._ids[old.alive]
+            self._alive = np.ones(len(self._ids), dtype=bool)
+
+        newly_removed = self._alive & ~arrays.alive
+        if newly_removed.any():
+            removed = np.concatenate([removed, self._ids[newly_removed]])
+            self._alive &= arrays.alive
+        return removed, False
+
+    def _topology_record(self):
+        i1, i2 = self._topology_arrays
+        header = {"topology": self._topology, "springs": len(i1), "first_frame": self.frames}
+        return header, [i1.astype(np.int32), i2.astype(np.int32)]
+
+    def _flush(self):
+        """Hand the buffered frames to the writer as one chunk"""
+        if self._pending:
+            header = {"first_frame": self._first_frame, "frames": len(self._pending),
+                      "particles": self._num_particles, "topology": self._topology}
+            self._put((_CHUNK, (header, np.stack(self._pending), self._pending_events)))
+        self._first_frame = self.frames
+        self._pending = []
+        self._pending_events = []
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Back-pressure: wait for the writer rather than buffer without bound
+            start = time.perf_counter()
+            self._queue.put(item)
+            self.blocked += time.perf_counter() - start
+
+    def close(self):
+        """Write out buffered frames and wait for the writer to finish"""
+        if self._thread is None:
+            return
+        self._flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        if self.error is not None:
+            raise self.error
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self.error is not None:
+                continue
+            try:
+                kind, record = item
+                if kind == _TOPOLOGY:
+                    header, arrays = record
+                    self._write_record(kind, header, arrays)
+                else:
+                    self._write_record(kind, *self._encode_chunk(*record))
+            except Exception as exc:
+                self.error = exc
+
+    def _encode_chunk(self, header, positions, events):
+        """Quantize and delta-encode a (frames, n, 2) block of positions"""
+        quantized = np.rint(positions / self.precision).astype(np.int64)
+        first = quantized[0].astype(np.int32)
+        deltas = np.diff(quantized, axis=0)
+        small = not len(deltas) or np.abs(deltas).max() < 2**15
+        deltas = deltas.astype(np.int16 if small else np.int32)
+        counts = np.array([len(e) for e in events], dtype=np.uint32)
+        ids = np.concatenate(events).astype(np.int32) if len(events) else np.zeros(0, dtype=np.int32)
+        header = dict(header, precision=self.precision, delta_dtype=deltas.dtype.str, events=len(ids))
+        return header, [first, deltas, counts, ids]
+
+    def _write_record(self, kind, header, arrays):
+        header_bytes = json.dumps(header).encode()
+        payload = zlib.compress(b"".join(np.ascontiguousarray(a).tobytes() for a in arrays), self.level)
+        self._file.write(_RECORD.pack(kind, len(header_bytes), len(payload)))
+        self._file.write(header_bytes)
+        self._file.write(payload)
+
+
+class TrajectoryReader:
+    """Random access to the frames of a trajectory log.
+
+    Opening reads only the record headers; chunks are decompressed on
+    demand and the most recent one is kept decoded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks = []  # (header, payload offset, payload length)
+        self.topologies = []
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            f.seek(0)
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size or _PREFIX.unpack(prefix)[0] != MAGIC:
+                raise TrajectoryError(f"{path}: not a trajectory log")
+            version = _PREFIX.unpack(prefix)[1]
+            if version > VERSION:
+                raise TrajectoryError(f"{path}: trajectory version {version} is newer than supported ({VERSION})")
+            while True:
+                record = f.read(_RECORD.size)
+                if len(record) < _RECORD.size:
+                    break  # End of the log, or a record cut off by a crash
+                kind, header_len, payload_len = _RECORD.unpack(record)
+                header = json.loads(f.read(header_len))
+                offset = f.tell()
+                if f.seek(payload_len, 1) > size:
+                    break
+                if kind == _TOPOLOGY:
+                    self.topologies.append((header, offset, payload_len))
+                else:
+                    self.chunks.append((header, offset, payload_len))
+        self._starts = [header["first_frame"] for header, _, _ in self.chunks]
+        self._cached = None
+
+    def __len__(self):
+        if not self.chunks:
+            return 0
+        header = self.chunks[-1][0]
+        return header["first_frame"] + header["frames"]
+
+    def _payload(self, offset, length):
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length))
+
+    def _chunk(self, frame):
+        """Decoded (header, positions, events) of the chunk holding frame"""
+        if not 0 <= frame < len(self):
+            raise IndexError(f"frame {frame} out of range for {len(self)} frames")
+        k = np.searchsorted(self._starts, frame, side="right") - 1
+        if self._cached is not None and self._cached[0] == k:
+            return self._cached[1]
+
+        header, offset, length = self.chunks[k]
+        data = self._payload(offset, length)
+        frames, n = header["frames"], header["particles"]
+        delta_dtype = np.dtype(header["delta_dtype"])
+        first_end = n * 2 * 4
+        deltas_end = first_end + (frames - 1) * n * 2 * delta_dtype.itemsize
+        counts_end = deltas_end + frames * 4
+        first = np.frombuffer(data, dtype=np.int32, count=n * 2).reshape(n, 2)
+        deltas = np.frombuffer(data[first_end:deltas_end], dtype=delta_dtype).reshape(frames - 1, n, 2)
+        counts = np.frombuffer(data[deltas_end:counts_end], dtype=np.uint32)
+        ids = np.frombuffer(data[counts_end:], dtype=np.int32, count=header["events"])
+
+        quantized = np.empty((frames, n, 2), dtype=np.int64)
+        quantized[0] = first
+        np.cumsum(deltas, axis=0, dtype=np.int64, out=quantized[1:])
+        quantized[1:] += first
+        positions = quantized * header["precision"]
+        events = np.split(ids, np.cumsum(counts)[:-1])
+        decoded = (header, positions, events)
+        self._cached = (k, decoded)
+        return decoded
+
+    def frame(self, index):
+        """Positions of frame index as an (N, 2) array"""
+        header, positions, _ = self._chunk(index)
+        return positions[index - header["first_frame"]]
+
+    def breaks(self, index):
+        """IDs of the springs removed during frame index"""
+        header, _, events = self._chunk(index)
+        return events[index - header["first_frame"]]
+
+    def topology(self, index):
+        """(i1, i2) endpoint arrays that frame index's spring IDs refer to"""
+        header = self._chunk(index)[0]
+        topo_header, offset, length = self.topologies[header["topology"]]
+        data = self._payload(offset, length)
+        count = topo_header["springs"]
+        both = np.frombuffer(data, dtype=np.int32, count=2 * count)
+        return both[:count], both[count:]
+
+    def frames(self, start=0, stop=None, step=1):
+        """Yield (index, positions, removed spring IDs) for a range of frames"""
+        for index in range(*slice(start, stop, step).indices(len(self))):
+            header, positions, events = self._chunk(index)
+            local = index - header["first_frame"]
+            yield index, positions[local], events[local]
+
+    def break_events(self):
+        """Yield (frame, spring IDs) for every frame in which springs were removed"""
+        for header, _, _ in self.chunks:
+            if not header["events"]:
+                continue
+            _, _, events = self._chunk(header["first_frame"])
+            for local, ids in enumerate(events):
+                if len(ids):
+                    yield header["first_frame"] + local, ids
+
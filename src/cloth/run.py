@@ -0,0 +1,219 @@
+"""Headless cloth simulation runner.
+
+Steps a ClothSystem as fast as possible with no display and no frame cap.
+pygame is never imported, so this runs on render-less batch nodes:
+
+    cd src
+    python -m cloth.run --steps 600 --grid 30x25 --seed 1 --out run.json
+
+Runs can be saved with --save-checkpoint and branched from with
+--from-checkpoint.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from .adaptive import AdaptiveIterations
+from .multigrid import Multigrid
+from .checkpoint import load_checkpoint, save_checkpoint
+from .cloth_system import PRECISIONS, SOLVERS, ClothSystem
+from .profiler import Profiler
+from .recorder import TrajectoryRecorder
+from .self_collision import SelfCollision
+
+
+def parse_grid(text):
+    """Parse a WxH grid size such as 30x25"""
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"grid must look like WxH, got {text!r}")
+    if w < 1 or h < 1:
+        raise argparse.ArgumentTypeError("grid dimensions must be positive")
+    return w, h
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cloth.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=600, help="number of update() calls to run")
+    parser.add_argument("--grid", type=parse_grid, default=(30, 25), help="cloth size as WxH (default 30x25)")
+    parser.add_argument("--spacing", type=float, default=12, help="rest distance between particles")
+    parser.add_argument("--mask", default=None,
+                        help="image whose alpha channel gives the cloth's shape (resampled to --grid)")
+    parser.add_argument("--solver", choices=SOLVERS, default="numpy")
+    parser.add_argument("--iterations", type=int, default=None, help="override ClothSystem.num_iterations")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64",
+                        help="float type of the numpy/pbd solver arrays")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="stop iterating at --tolerance (pbd solver) and skip frames once settled")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="adaptive stretch error tolerance")
+    parser.add_argument("--min-iterations", type=int, default=1, help="adaptive lower iteration bound")
+    parser.add_argument("--max-iterations", type=int, default=16, help="adaptive upper iteration bound")
+    parser.add_argument("--multigrid", action="store_true",
+                        help="project coarse levels of the grid first (pbd solver)")
+    parser.add_argument("--multigrid-sweeps", type=int, default=2, help="sweeps per coarse level and substep")
+    parser.add_argument("--island-sleep", action="store_true",
+                        help="let settled or detached pieces of cloth sleep")
+    parser.add_argument("--self-collision", action="store_true",
+                        help="keep pieces of cloth from passing through each other")
+    parser.add_argument("--thickness", type=float, default=5.0, help="self-collision thickness radius")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the initial particle jitter (random if omitted, always reported)")
+    parser.add_argument("--width", type=int, default=800, help="simulation bounds width")
+    parser.add_argument("--height", type=int, default=800, help="simulation bounds height")
+    parser.add_argument("--out", default=None, help="write run stats and final positions as JSON")
+    parser.add_argument("--from-checkpoint", default=None,
+                        help="start from a saved checkpoint (its cloth, solver, seed and bounds) instead of a new cloth")
+    parser.add_argument("--save-checkpoint", default=None, help="save the final state as a checkpoint")
+    parser.add_argument("--record", default=None,
+                        help="write every frame's positions and spring breaks to a trajectory log")
+    parser.add_argument("--profile", default=None,
+                        help="time each solver stage per step and write the timings to PATH (.csv or JSON lines)")
+    return parser
+
+
+def run(steps, grid=(30, 25), spacing=12, solver="numpy", iterations=None, seed=None,
+        width=800, height=800, adaptive=None, island_sleep=False, checkpoint=None,
+        record=None, profile=None, self_collision=None, precision="float64", mask=None, multigrid=None):
+    """Run a headless simulation and return (cloth_system, stats)
+
+    adaptive is an optional AdaptiveIterations; stats then include the
+    per-frame iteration counts and how many frames were skipped asleep.
+    checkpoint is the path of a saved state to continue from; the cloth,
+    solver, seed and bounds then come from it. record is the path of a
+    trajectory log to write every frame to (see cloth.recorder). profile is
+    the path per-step stage timings are exported to; stats then include
+    their percentiles. self_collision is an optional SelfCollision; stats
+    then include its mean broad phase pairs, contacts and timings.
+    precision is the float type of the solver arrays (see PRECISIONS).
+    mask is an optional image path; the cloth then takes the shape of its
+    alpha channel, resampled to grid. multigrid is an optional Multigrid
+    hierarchy for the pbd solver; stats then include its level counts.
+    """
+    if checkpoint is not None:
+        cloth_system = load_checkpoint(checkpoint)
+        grid = (cloth_system.grid_w, cloth_system.grid_h)
+        solver = cloth_system.solver
+        seed = cloth_system.seed
+    else:
+        if seed is None:
+            seed = random.randrange(2**32)
+        cloth_system = ClothSystem(solver=solver, seed=seed, width=width, height=height, precision=precision)
+        if mask is not None:
+            cloth_system.create_from_mask(mask, spacing, size=grid)
+        else:
+            cloth_system.create_cloth(grid[0], grid[1], spacing)
+    if iterations is not None:
+        cloth_system.num_iterations = iterations
+    cloth_system.adaptive = adaptive
+    cloth_system.island_sleep = island_sleep
+    cloth_system.multigrid = multigrid
+    cloth_system.self_collision = self_collision
+    recorder = cloth_system.recorder = TrajectoryRecorder(record) if record is not None else None
+    if profile is not None:
+        cloth_system.profiler = Profiler(enabled=True, window=max(steps, 1), export=profile)
+    profiler = cloth_system.profiler
+
+    frame_iterations = []
+    collision_frames = []
+    asleep_frames = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        cloth_system.update()
+        frame_iterations.append(cloth_system.frame_stats["iterations"])
+        asleep_frames += cloth_system.frame_stats["asleep"]
+        if self_collision is not None and not cloth_system.frame_stats["asleep"]:
+            collision_frames.append(self_collision.stats)
+        profiler.end_frame()
+    if recorder is not None:
+        recorder.close()
+        cloth_system.recorder = None
+    elapsed = time.perf_counter() - start
+    profiler.close()
+
+    stats = {
+        "grid": list(grid),
+        "spacing": spacing,
+        "solver": solver,
+        "precision": cloth_system.precision,
+        "iterations": cloth_system.num_iterations,
+        "seed": seed,
+        "steps": steps,
+        "elapsed": elapsed,
+        "steps_per_second": steps / elapsed if elapsed > 0 else float("inf"),
+        "particles": sum(len(row) for row in cloth_system.particles),
+        "springs": len(cloth_system.springs),
+        "residuals": cloth_system.residuals,
+        "adaptive": adaptive is not None,
+        "mean_iterations": sum(frame_iterations) / steps if steps else 0.0,
+        "frame_iterations": frame_iterations,
+        "asleep_frames": asleep_frames,
+        "islands": cloth_system.islands.stats() if island_sleep else None,
+        "multigrid": dict(multigrid.stats) if multigrid is not None else None,
+        "recorded_frames": recorder.frames if recorder is not None else 0,
+        "profile": profiler.summary() if profile is not None else None,
+        "collision": {name: sum(frame[name] for frame in collision_frames) / len(collision_frames)
+                      for name in collision_frames[0]} if collision_frames else None,
+    }
+    return cloth_system, stats
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    adaptive = None
+    if args.adaptive:
+        adaptive = AdaptiveIterations(args.tolerance, min_iterations=args.min_iterations,
+                                      max_iterations=args.max_iterations)
+    self_collision = SelfCollision(args.thickness) if args.self_collision else None
+    multigrid = Multigrid(sweeps=args.multigrid_sweeps) if args.multigrid else None
+    cloth_system, stats = run(
+        args.steps, args.grid, args.spacing, args.solver, args.iterations, args.seed,
+        args.width, args.height, adaptive, args.island_sleep, args.from_checkpoint, args.record,
+        args.profile, self_collision, args.precision, args.mask, multigrid,
+    )
+    if args.save_checkpoint:
+        save_checkpoint(cloth_system, args.save_checkpoint)
+
+    print(f"{stats['grid'][0]}x{stats['grid'][1]} cloth, {stats['solver']} solver ({stats['precision']}), "
+          f"seed {stats['seed']}")
+    print(f"{stats['steps']} steps in {stats['elapsed']:.3f}s ({stats['steps_per_second']:.1f} steps/s), "
+          f"{stats['springs']} springs left")
+    if stats["adaptive"]:
+        print(f"{stats['mean_iterations']:.2f} iterations per frame on average, "
+              f"{stats['asleep_frames']} frames skipped while settled")
+    if stats["islands"]:
+        islands = stats["islands"]
+        print(f"{islands['islands']} islands, {islands['sleeping_islands']} asleep: "
+              f"{islands['active_particles']} active / {islands['sleeping_particles']} sleeping particles")
+    if stats["multigrid"]:
+        levels = stats["multigrid"]
+        print(f"multigrid: {levels['levels']} levels, {levels['constraints']} coarse constraints "
+              f"({levels['inactive']} switched off by broken springs), {levels['rebuilds']} rebuilds")
+    if stats["recorded_frames"]:
+        print(f"{stats['recorded_frames']} frames recorded to {args.record}")
+    if stats["collision"]:
+        collision = stats["collision"]
+        print(f"self-collision per step: {collision['particle_pairs']:.0f} particle / {collision['edge_pairs']:.0f} edge "
+              f"candidate pairs, {collision['particle_contacts'] + collision['edge_contacts']:.0f} contacts, "
+              f"broad phase {collision['broad_phase_ms']:.2f} ms, narrow phase {collision['narrow_phase_ms']:.2f} ms")
+    if stats["profile"]:
+        print(f"{'stage':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, row in stats["profile"]["stages"].items():
+            print(f"{name:<16}{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}")
+        for name, row in stats["profile"]["counters"].items():
+            print(f"{name:<16}{row['mean']:>9.1f} mean per step")
+    if stats["residuals"]:
+        print("constraint residual per iteration: " + " ".join(f"{r:.4g}" for r in stats["residuals"]))
+
+    if args.out:
+        result = dict(stats)
+        result["positions"] = [[p.x, p.y] for row in cloth_system.particles for p in row]
+        with open(args.out, "w") as f:
+            json.dump(result, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Recording and headless replay of interactive sessions.
+
+A SessionRecorder logs what the user did to a ClothSystem (tool
+switches, grabs, particle moves, releases, cuts and cloth resets), each
+tagged with the physics step it happened before and its time since the
+recording started. The log is JSON lines: a header with the seed and
+settings the cloth was created with (self-collision included), one line per event and an end line
+with the step count and a digest of the final state.
+
+replay() rebuilds the cloth from the header and drives it through the
+same events at full speed without pygame, timing every step, so a slow
+or broken interactive session can be reproduced and profiled:
+
+    cd src
+    python -m cloth.session session.jsonl --out timings.json
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+import numpy as np
+
+from .cloth_system import SOLVERS, ClothSystem
+from .self_collision import SelfCollision
+
+VERSION = 1
+
+# Cloth shapes offered by the interface, by the name logged on reset
+CLOTH_SHAPES = {
+    "cloth": lambda cs: cs.create_cloth(30, 25, 12),
+    "strip": lambda cs: cs.create_strip(),
+}
+
+# ClothSystem attributes stored in the header and restored on replay
+SETTINGS = ("gravity", "damping", "spring_strength", "num_iterations", "grab_radius", "cut_radius",
+            "max_dead_ratio")
+
+
+def state_digest(cloth_system):
+    """Hash of the particle positions and live springs, to compare end states"""
+    digest = hashlib.sha256(cloth_system.positions().tobytes())
+    arrays = cloth_system.springs.arrays()
+    live = arrays.alive
+    digest.update(arrays.i1[live].tobytes())
+    digest.update(arrays.i2[live].tobytes())
+    return digest.hexdigest()
+
+
+class SessionRecorder:
+    """Log the interactions with a ClothSystem to a JSON lines file.
+
+    The cloth should be freshly created with a known seed, since replay
+    rebuilds it from the seed and settings in the header.
+    """
+
+    def __init__(self, path, cloth_system):
+        if cloth_system.seed is None:
+            raise ValueError("recording a session needs a ClothSystem with a seed")
+        self.cloth = cloth_system
+        self.events = 0
+        self._start = time.perf_counter()
+        self._file = open(path, "w", buffering=1)
+        collision = cloth_system.self_collision
+        self._write({
+            "type": "session",
+            "version": VERSION,
+            "seed": cloth_system.seed,
+            "solver": cloth_system.solver,
+            "precision": cloth_system.precision,
+            "width": cloth_system.WIDTH,
+            "height": cloth_system.HEIGHT,
+            "step": cloth_system.steps,
+            "settings": {name: getattr(cloth_system, name) for name in SETTINGS},
+            "self_collision": collision.settings() if collision is not None else None,
+        })
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+    def log(self, kind, **data):
+        """Log an event of the given kind before the cloth's next step"""
+        self._write(dict(type=kind, step=self.cloth.steps, time=time.perf_counter() - self._start, **data))
+        self.events += 1
+
+    def close(self):
+        """Write the end line with the final state digest"""
+        if self._file.closed:
+            return
+        self._write({"type": "end", "step": self.cloth.steps, "time": time.perf_counter() - self._start,
+                     "digest": state_digest(self.cloth)})
+        self._file.close()
+
+
+def load_session(path):
+    """Read a session log into (header, events, end); end is None if the log was cut short"""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records or records[0].get("type") != "session":
+        raise ValueError(f"{path}: not a session log")
+    header = records[0]
+    if header["version"] > VERSION:
+        raise ValueError(f"{path}: session version {header['version']} is newer than supported ({VERSION})")
+    end = records[-1] if records[-1]["type"] == "end" else None
+    events = records[1:-1] if end is not None else records[1:]
+    return header, events, end
+
+
+def apply_event(cloth_system, event, held):
+    """Apply one logged event; held is the grabbed particle, returns the new one"""
+    kind = event["type"]
+    if kind == "grab":
+        return cloth_system.grab_particle(event["x"], event["y"])
+    if kind == "move":
+        if held is not None and not held.fixed:
+            held.move(event["x"], event["y"])
+        return held
+    if kind == "release":
+        return None
+    if kind == "cut":
+        cloth_system.cut_segment(event["x0"], event["y0"], event["x1"], event["y1"])
+        return held
+    if kind == "reset":
+        CLOTH_SHAPES[event["cloth"]](cloth_system)
+        return None
+    if kind == "tool":
+        cloth_system.current_tool = event["tool"]
+        return held
+    raise ValueError(f"unknown session event {kind!r}")
+
+
+def replay(path, solver=None):
+    """Replay a session log headlessly as fast as possible.
+
+    Returns (cloth_system, stats); stats hold the time of every step and,
+    when the log is complete and the solver is the recorded one, whether
+    the final state matches the recording.
+    """
+    header, events, end = load_session(path)
+    recorded_solver = header["solver"]
+    cloth_system = ClothSystem(solver=solver or recorded_solver, seed=header["seed"],
+                               width=header["width"], height=header["height"],
+                               precision=header.get("precision", "float64"))
+    for name, value in header["settings"].items():
+        setattr(cloth_system, name, value)
+    if header.get("self_collision") is not None:
+        cloth_system.self_collision = SelfCollision(**header["self_collision"])
+    cloth_system.steps = header["step"]
+
+    last_step = end["step"] if end is not None else (events[-1]["step"] if events else header["step"])
+    step_times = []
+    held = None
+    k = 0
+    start = time.perf_counter()
+    while True:
+        # Events logged at this step happened before it ran
+        while k < len(events) and events[k]["step"] <= cloth_system.steps:
+            held = apply_event(cloth_system, events[k], held)
+            k += 1
+        if cloth_system.steps >= last_step:
+            break
+        t = time.perf_counter_ns()
+        cloth_system.update()
+        step_times.append((time.perf_counter_ns() - t) / 1e9)
+    elapsed = time.perf_counter() - start
+
+    matches = None
+    if end is not None and cloth_system.solver == recorded_solver:
+        matches = state_digest(cloth_system) == end["digest"]
+    times = np.array(step_times) if step_times else np.zeros(1)
+    stats = {
+        "solver": cloth_system.solver,
+        "seed": header["seed"],
+        "events": len(events),
+        "steps": len(step_times),
+        "elapsed": elapsed,
+        "recorded_time": end["time"] if end is not None else None,
+        "step_times": step_times,
+        "step_p50": float(np.percentile(times, 50)),
+        "step_p95": float(np.percentile(times, 95)),
+        "step_max": float(times.max()),
+        "matches": matches,
+    }
+    return cloth_system, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cloth.session", description="Replay a recorded session headlessly")
+    parser.add_argument("session", help="session log written by SessionRecorder (main.py --record-session)")
+    parser.add_argument("--solver", choices=SOLVERS, default=None, help="replay with another solver than recorded")
+    parser.add_argument("--out", default=None, help="write the stats and per-step times as JSON")
+    args = parser.parse_args(argv)
+
+    _, stats = replay(args.session, args.solver)
+    print(f"{stats['events']} events over {stats['steps']} steps, {stats['solver']} solver, seed {stats['seed']}")
+    print(f"replayed in {stats['elapsed']:.3f}s; step p50 {stats['step_p50'] * 1000:.2f} ms, "
+          f"p95 {stats['step_p95'] * 1000:.2f} ms, max {stats['step_max'] * 1000:.2f} ms")
+    if stats["matches"] is not None:
+        print("final state matches the recording" if stats["matches"] else "final state DIFFERS from the recording")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(stats, f)
+    return 0 if stats["matches"] is not False else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import numpy as np
+
+from physics.cells import cell_coords, pack
+
+
+class SpatialHash:
+    """Uniform grid over a set of points.
+
+    Points are bucketed by cell and stored sorted by cell key, so a query
+    only touches the cells overlapping its bounding box. Both building and
+    querying are vectorized; query cost scales with the number of points
+    near the query, not with the total number of points.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.xs = np.zeros(0)
+        self.ys = np.zeros(0)
+        self._order = np.zeros(0, dtype=np.int64)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._ends = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cell(self, v):
+        return cell_coords(v, self.cell_size)
+
+    def build(self, xs, ys):
+        """Rebuild the grid from point coordinate arrays"""
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        keys = pack(self._cell(self.xs), self._cell(self.ys))
+        self._order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self._order]
+        self._keys, self._starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        self._ends = self._starts + counts
+
+    def query_box(self, x0, y0, x1, y1):
+        """Return the sorted indices of points in cells overlapping a box"""
+        if not len(self._keys):
+            return np.zeros(0, dtype=np.int64)
+        cx = np.arange(self._cell(min(x0, x1)), self._cell(max(x0, x1)) + 1)
+        cy = np.arange(self._cell(min(y0, y1)), self._cell(max(y0, y1)) + 1)
+        wanted = pack(cx[:, None], cy[None, :]).ravel()
+
+        slots = np.searchsorted(self._keys, wanted)
+        inside = slots < len(self._keys)
+        slots = slots[inside]
+        slots = slots[self._keys[slots] == wanted[inside]]
+        if not len(slots):
+            return np.zeros(0, dtype=np.int64)
+
+        starts = self._starts[slots]
+        counts = self._ends[slots] - starts
+        # Expand the [start, end) ranges of every hit cell into one index array
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = offsets + np.arange(counts.sum())
+        return np.sort(self._order[positions])
+
+    def query_radius(self, x, y, radius):
+        """Return the sorted indices of points within radius of (x, y)"""
+        candidates = self.query_box(x - radius, y - radius, x + radius, y + radius)
+        dx = self.xs[candidates] - x
+        dy = self.ys[candidates] - y
+        return candidates[dx * dx + dy * dy < radius * radius]
+
+    def query_segment(self, x0, y0, x1, y1, radius):
+        """Return the sorted indices of points within radius of the segment (x0, y0)-(x1, y1)"""
+        candidates = self.query_box(min(x0, x1) - radius, min(y0, y1) - radius,
+                                    max(x0, x1) + radius, max(y0, y1) + radius)
+        dist_sq = segment_distance_sq(self.xs[candidates], self.ys[candidates], x0, y0, x1, y1)
+        return candidates[dist_sq < radius * radius]
+
+    def nearest(self, x, y, radius):
+        """Return the index of the closest point within radius, or None"""
+        candidates = self.query_box(x - radius, y - radius, x + radius, y + radius)
+        if not len(candidates):
+            return None
+        dx = self.xs[candidates] - x
+        dy = self.ys[candidates] - y
+        dist_sq = dx * dx + dy * dy
+        best = int(np.argmin(dist_sq))  # first minimum, i.e. lowest index on ties
+        if dist_sq[best] >= radius * radius:
+            return None
+        return int(candidates[best])
+
+
+def segment_distance_sq(px, py, x0, y0, x1, y1):
+    """Squared distance from points (px, py) to the segments (x0, y0)-(x1, y1)
+
+    Any argument may be a scalar or an array; arrays broadcast together.
+    """
+    lx = np.subtract(x1, x0, dtype=float)
+    ly = np.subtract(y1, y0, dtype=float)
+    length_sq = lx * lx + ly * ly
+    safe = np.where(length_sq == 0, 1.0, length_sq)
+    t = np.clip(((px - x0) * lx + (py - y0) * ly) / safe, 0.0, 1.0)
+    t = np.where(length_sq == 0, 0.0, t)
+    cx = x0 + t * lx - px
+    cy = y0 + t * ly - py
+    return cx * cx + cy * cy
+
+
+class ClothIndex:
+    """Spatial index over a ClothSystem's particles and spring midpoints.
+
+    The index is rebuilt lazily: ClothSystem marks it stale after every
+    update() or topology change, and the next query rebuilds it. Springs
+    are hashed by their midpoint and queried with a radius padded by the
+    longest half-spring, so no spring near a query point is missed.
+    """
+
+    def __init__(self, cloth_system, cell_size=20):
+        self.cloth = cloth_system
+        self.particles = SpatialHash(cell_size)
+        self.springs = SpatialHash(cell_size)
+        self.flat_particles = []
+        self.spring_slots = np.zeros(0, dtype=np.int64)
+        self.i1 = np.zeros(0, dtype=np.int64)
+        self.i2 = np.zeros(0, dtype=np.int64)
+        self.spring_pad = 0.0
+        self.stale = True
+        self._layout_version = None
+
+    def invalidate(self):
+        self.stale = True
+
+    def refresh(self):
+        """Rebuild the hashes if the cloth moved or changed since the last build"""
+        springs = self.cloth.springs
+        if not self.stale and springs.layout_version == self._layout_version:
+            return
+        self.flat_particles = self.cloth.flat_particles
+        arrays = springs.arrays()
+        self._layout_version = springs.layout_version
+        self.spring_slots = np.flatnonzero(arrays.alive)
+        self.i1 = arrays.i1[self.spring_slots]
+        self.i2 = arrays.i2[self.spring_slots]
+
+        positions = self.cloth.positions()
+        xs, ys = positions[:, 0], positions[:, 1]
+        self.particles.build(xs, ys)
+
+        x1, y1 = xs[self.i1], ys[self.i1]
+        x2, y2 = xs[self.i2], ys[self.i2]
+        self.springs.build((x1 + x2) * 0.5, (y1 + y2) * 0.5)
+        self.spring_pad = float(np.hypot(x2 - x1, y2 - y1).max()) * 0.5 if len(self.i1) else 0.0
+        self.stale = False
+
+    def nearest_particle(self, x, y, radius):
+        """Return the closest particle within radius of (x, y), or None"""
+        self.refresh()
+        i = self.particles.nearest(x, y, radius)
+        return None if i is None else self.flat_particles[i]
+
+    def particles_in_radius(self, x, y, radius):
+        """Return the particles within radius of (x, y)"""
+        self.refresh()
+        return [self.flat_particles[i] for i in self.particles.query_radius(x, y, radius).tolist()]
+
+    def spring_slots_near_segment(self, x0, y0, x1, y1, radius):
+        """Return SpringList slots of springs within radius of a segment"""
+        self.refresh()
+        pad = radius + self.spring_pad
+        candidates = self.springs.query_box(min(x0, x1) - pad, min(y0, y1) - pad,
+                                            max(x0, x1) + pad, max(y0, y1) + pad)
+        xs, ys = self.particles.xs, self.particles.ys
+        a, b = self.i1[candidates], self.i2[candidates]
+        dist_sq = segment_segment_distance_sq(xs[a], ys[a], xs[b], ys[b], x0, y0, x1, y1)
+        return self.spring_slots[candidates[dist_sq < radius * radius]]
+
+    def springs_near_segment(self, x0, y0, x1, y1, radius):
+        """Return the springs within radius of the segment (x0, y0)-(x1, y1)"""
+        slots = self.cloth.springs.slots
+        found = (slots[k] for k in self.spring_slots_near_segment(x0, y0, x1, y1, radius).tolist())
+        # Skip springs removed since the index was built
+        return [s for s in found if s is not None]
+
+    def springs_in_radius(self, x, y, radius):
+        """Return the springs passing within radius of (x, y)"""
+        return self.springs_near_segment(x, y, x, y, radius)
+
+
+def segment_segment_distance_sq(ax, ay, bx, by, cx, cy, dx, dy):
+    """Squared distance between segments a-b (arrays) and c-d
+
+    Segments that cross have distance zero; otherwise the closest pair of
+    points always involves an endpoint of one of the two segments.
+    """
+    d = np.minimum.reduce([
+        segment_distance_sq(ax, ay, cx, cy, dx, dy),
+        segment_distance_sq(bx, by, cx, cy, dx, dy),
+        segment_distance_sq(cx, cy, ax, ay, bx, by),
+        segment_distance_sq(dx, dy, ax, ay, bx, by),
+    ])
+
+    def orient(px, py, qx, qy, rx, ry):
+        return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+
+    o1 = orient(ax, ay, bx, by, cx, cy)
+    o2 = orient(ax, ay, bx, by, dx, dy)
+    o3 = orient(cx, cy, dx, dy, ax, ay)
+    o4 = orient(cx, cy, dx, dy, bx, by)
+    crossing = (o1 * o2 < 0) & (o3 * o4 < 0)
+    return np.where(crossing, 0.0, d)
@@ -2,6 +2,8 @@ import math
 
 
 class Spring:
+    __slots__ = ("p1", "p2", "rest_length", "spring_constant", "max_stretch", "broken", "slot")
+
     def __init__(self, p1, p2, strength=0.1, breaking_threshold=5.0):
         self.p1 = p1
         self.p2 = p2
@@ -15,6 +17,7 @@ class Spring:
         self.spring_constant = strength  # Use the provided strength parameter
         self.max_stretch = self.rest_length * breaking_threshold
         self.broken = False
+        self.slot = None  # Position in the owning SpringList
 
     def apply(self, epsilon=1e-6):
         if self.broken:
@@ -46,4 +49,5 @@ class Spring:
         return False
 
     def draw(self, screen, color):
+        import pygame
         pygame.draw.line(screen, color, self.p1.pos(), self.p2.pos(), 2)
\ No newline at end of file
@@ -0,0 +1,154 @@
+import numpy as np
+
+
+class SpringArrays:
+    """Slot-indexed spring properties packed for the vectorized code paths.
+
+    Lengths and stiffness use dtype (the cloth's precision); endpoint
+    indices are always int64.
+    """
+
+    def __init__(self, slots, index, dtype=np.float64):
+        m = len(slots)
+        live = [s for s in slots if s is not None]
+        self.alive = np.fromiter((s is not None for s in slots), dtype=bool, count=m)
+        self.i1 = np.zeros(m, dtype=np.int64)
+        self.i2 = np.zeros(m, dtype=np.int64)
+        self.rest_length = np.zeros(m, dtype=dtype)
+        self.stiffness = np.zeros(m, dtype=dtype)
+        self.max_stretch = np.zeros(m, dtype=dtype)
+
+        where = np.flatnonzero(self.alive)
+        n = len(live)
+        self.i1[where] = np.fromiter((index[id(s.p1)] for s in live), dtype=np.int64, count=n)
+        self.i2[where] = np.fromiter((index[id(s.p2)] for s in live), dtype=np.int64, count=n)
+        self.rest_length[where] = np.fromiter((s.rest_length for s in live), dtype=float, count=n)
+        self.stiffness[where] = np.fromiter((s.spring_constant for s in live), dtype=float, count=n)
+        self.max_stretch[where] = np.fromiter((s.max_stretch for s in live), dtype=float, count=n)
+
+    @classmethod
+    def packed(cls, i1, i2, rest_length, stiffness, max_stretch, dtype=np.float64):
+        """Arrays for a list of live springs whose values are already packed"""
+        arrays = cls.__new__(cls)
+        arrays.alive = np.ones(len(i1), dtype=bool)
+        arrays.i1 = np.array(i1, dtype=np.int64)
+        arrays.i2 = np.array(i2, dtype=np.int64)
+        arrays.rest_length = np.array(rest_length, dtype=dtype)
+        arrays.stiffness = np.array(stiffness, dtype=dtype)
+        arrays.max_stretch = np.array(max_stretch, dtype=dtype)
+        return arrays
+
+
+class SpringList:
+    """Container of live springs with O(1) removal.
+
+    Removed springs leave a tombstone (None) in their slot instead of
+    shifting the list, and compact() squeezes the tombstones out once they
+    make up a large enough share of the slots. Two counters let dependent
+    caches tell what changed:
+
+    - version bumps on every add or removal (topology changed)
+    - layout_version bumps when slot numbers change (append, compact)
+
+    Slots removed since the last layout change are logged in removed, so
+    caches keyed by slot can be updated incrementally. dtype is the float
+    type of the packed arrays.
+    """
+
+    def __init__(self, springs=(), dtype=np.float64):
+        self._slots = []
+        self._live = 0
+        self._index = None
+        self._arrays = None
+        self.dtype = dtype
+        self.version = 0
+        self.layout_version = 0
+        self.removed = []
+        self.extend(springs)
+
+    def __len__(self):
+        return self._live
+
+    def __iter__(self):
+        return filter(None, self._slots)
+
+    def __contains__(self, spring):
+        slot = spring.slot
+        return slot is not None and slot < len(self._slots) and self._slots[slot] is spring
+
+    @property
+    def slots(self):
+        """Slot list including tombstones, indexed like the packed arrays"""
+        return self._slots
+
+    def append(self, spring):
+        spring.slot = len(self._slots)
+        self._slots.append(spring)
+        self._live += 1
+        self._layout_changed()
+
+    def extend(self, springs):
+        springs = list(springs)
+        for slot, spring in enumerate(springs, len(self._slots)):
+            spring.slot = slot
+        self._slots.extend(springs)
+        self._live += len(springs)
+        if springs:
+            self._layout_changed()
+
+    def remove(self, spring):
+        """Tombstone a spring; raises ValueError if it is not in the list"""
+        if not self.discard(spring):
+            raise ValueError("spring not in SpringList")
+
+    def discard(self, spring):
+        """Tombstone a spring if present and return whether it was"""
+        if spring not in self:
+            return False
+        slot = spring.slot
+        self._slots[slot] = None
+        spring.slot = None
+        self._live -= 1
+        self.version += 1
+        self.removed.append(slot)
+        if self._arrays is not None:
+            self._arrays.alive[slot] = False
+        return True
+
+    def dead_ratio(self):
+        """Fraction of slots holding tombstones"""
+        return 1 - self._live / len(self._slots) if self._slots else 0.0
+
+    def compact(self):
+        """Drop tombstones and renumber the live springs"""
+        self._slots = [s for s in self._slots if s is not None]
+        for slot, spring in enumerate(self._slots):
+            spring.slot = slot
+        self._layout_changed()
+
+    def maybe_compact(self, max_dead_ratio=0.25):
+        """Compact once tombstones exceed max_dead_ratio of the slots"""
+        if self.dead_ratio() > max_dead_ratio:
+            self.compact()
+            return True
+        return False
+
+    def _layout_changed(self):
+        self.version += 1
+        self.layout_version += 1
+        self.removed = []
+        self._arrays = None
+
+    def bind(self, index, arrays=None):
+        """Set the particle -> flat index mapping used to pack the arrays.
+
+        arrays may hand over already packed SpringArrays for the current slots.
+        """
+        self._index = index
+        self._arrays = arrays
+
+    def arrays(self):
+        """Packed slot-indexed arrays, rebuilt only after a layout change"""
+        if self._arrays is None:
+            self._arrays = SpringArrays(self._slots, self._index, self.dtype)
+        return self._arrays
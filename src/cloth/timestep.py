@@ -0,0 +1,93 @@
+class FixedTimestep:
+    """Fixed-dt physics scheduler with an accumulator.
+
+    Real frame time is banked in an accumulator and spent in whole physics
+    steps of 1 / physics_hz seconds, so the simulation advances at the same
+    rate however fast frames are rendered. At most max_substeps steps run
+    per frame; time beyond that is dropped instead of piling up (no spiral
+    of death when a frame stalls). The leftover fraction of a step is used
+    to interpolate rendered positions between the last two physics states.
+    """
+
+    def __init__(self, physics_hz=60, max_substeps=5):
+        if physics_hz <= 0:
+            raise ValueError(f"physics_hz must be positive, got {physics_hz!r}")
+        self.physics_hz = physics_hz
+        self.dt = 1.0 / physics_hz
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+
+        self._previous = None
+        self._current = None
+
+        # Stats
+        self.frames = 0
+        self.steps = 0
+        self.last_steps = 0
+        self.substepped_frames = 0  # frames that ran more than one step
+        self.idle_frames = 0        # frames that ran no step (render faster than physics)
+        self.dropped_frames = 0     # frames that hit max_substeps and dropped time
+        self.dropped_time = 0.0
+
+    @property
+    def alpha(self):
+        """Fraction of a physics step banked in the accumulator, in [0, 1)"""
+        return self.accumulator / self.dt
+
+    def advance(self, frame_time):
+        """Bank frame_time seconds and return how many physics steps to run"""
+        self.accumulator += frame_time
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_substeps:
+            dropped = (steps - self.max_substeps) * self.dt
+            self.accumulator -= dropped
+            self.dropped_time += dropped
+            self.dropped_frames += 1
+            steps = self.max_substeps
+        self.accumulator -= steps * self.dt
+
+        self.frames += 1
+        self.steps += steps
+        self.last_steps = steps
+        if steps > 1:
+            self.substepped_frames += 1
+        elif steps == 0:
+            self.idle_frames += 1
+        return steps
+
+    def run(self, cloth_system, frame_time):
+        """Advance cloth_system by frame_time seconds of fixed-size steps"""
+        steps = self.advance(frame_time)
+        for i in range(steps):
+            if i == steps - 1:
+                # Only the last two physics states are needed for interpolation
+                self._previous = cloth_system.positions()
+            cloth_system.update()
+        if steps:
+            self._current = cloth_system.positions()
+        return steps
+
+    def interpolated_positions(self, cloth_system):
+        """Particle positions blended between the last two physics states"""
+        current = cloth_system.positions()
+        previous = self._previous
+        # A new cloth has no matching history, so show the live state
+        if previous is None or self._current is None or previous.shape != current.shape:
+            return current
+        blended = previous + (current - previous) * self.alpha
+        # Particles moved by the mouse since the last step are shown where they are now
+        moved = (self._current != current).any(axis=1)
+        if moved.any():
+            blended[moved] = current[moved]
+        return blended
+
+    def stats(self):
+        return {
+            "physics_hz": self.physics_hz,
+            "frames": self.frames,
+            "steps": self.steps,
+            "substepped_frames": self.substepped_frames,
+            "idle_frames": self.idle_frames,
+            "dropped_frames": self.dropped_frames,
+            "dropped_time": self.dropped_time,
+        }
@@ -0,0 +1,167 @@
+"""Cloth topology templates.
+
+A template is the part of a cloth that depends only on its shape: which
+cells of a grid hold a particle, which particles are pinned, and the
+endpoints, stiffness and breaking thresholds of every spring, in the
+order create_cloth has always added them. Templates are built with array
+operations and memoized, so resetting to a shape seen before only copies
+arrays. Positions and rest lengths depend on spacing and placement and are
+computed when ClothSystem places a template, so the cache is shared by
+every spacing.
+
+Shapes are boolean masks over a grid: a full rectangle for create_cloth,
+or the alpha channel of an image (load_mask) for create_from_mask.
+"""
+import gc
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+from .particle import Particle
+from .spring import Spring
+
+# Springs each particle adds to particles above and to its left, in order:
+# (row offset, column offset, strength, breaking threshold)
+SPRING_KINDS = (
+    (0, -1, 0.25, 8.0),   # structural, horizontal
+    (-1, 0, 0.25, 8.0),   # structural, vertical
+    (-1, -1, 0.08, 6.0),  # shear
+    (-1, 1, 0.08, 6.0),   # shear
+    (0, -2, 0.03, 5.0),   # bend, horizontal
+    (-2, 0, 0.03, 5.0),   # bend, vertical
+)
+
+
+class Template:
+    """Read-only shape of a cloth: particle cells, pins and springs.
+
+    rows/cols are the grid cell of each particle in row-major order and
+    index maps grid cells to particle indices (-1 where the mask is empty).
+    Spring i1 is the earlier particle and i2 the one that added it.
+    """
+
+    def __init__(self, mask, pin_every):
+        h, w = mask.shape
+        index = np.full((h, w), -1, dtype=np.int64)
+        rows, cols = np.nonzero(mask)
+        n = len(rows)
+        index[rows, cols] = np.arange(n)
+
+        # Every pin_every-th column is pinned at its topmost particle
+        fixed = np.zeros(n, dtype=bool)
+        if pin_every:
+            top = np.argmax(mask, axis=0)
+            pinned = np.flatnonzero(mask.any(axis=0) & (np.arange(w) % pin_every == 0))
+            fixed[index[top[pinned], pinned]] = True
+
+        # Candidate partner of each particle for each spring kind, -1 if absent
+        partners = np.full((n, len(SPRING_KINDS)), -1, dtype=np.int64)
+        for k, (dr, dc, _, _) in enumerate(SPRING_KINDS):
+            r, c = rows + dr, cols + dc
+            inside = (r >= 0) & (c >= 0) & (c < w)
+            partners[inside, k] = index[r[inside], c[inside]]
+        valid = partners >= 0
+        kinds = np.broadcast_to(np.arange(len(SPRING_KINDS)), partners.shape)[valid]
+
+        self.shape = (h, w)
+        self.full = n == h * w
+        self.rows = rows
+        self.cols = cols
+        self.index = index
+        self.fixed = fixed
+        self.i1 = partners[valid]
+        self.i2 = np.broadcast_to(np.arange(n)[:, None], partners.shape)[valid]
+        self.stiffness = np.array([kind[2] for kind in SPRING_KINDS])[kinds]
+        self.threshold = np.array([kind[3] for kind in SPRING_KINDS])[kinds]
+        for array in (rows, cols, index, fixed, self.i1, self.i2, self.stiffness, self.threshold):
+            array.setflags(write=False)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+@lru_cache(maxsize=16)
+def _cached_template(h, w, packed_mask, pin_every):
+    if packed_mask is None:
+        mask = np.ones((h, w), dtype=bool)
+    else:
+        mask = np.unpackbits(np.frombuffer(packed_mask, dtype=np.uint8), count=h * w).reshape(h, w).astype(bool)
+    return Template(mask, pin_every)
+
+
+def grid_template(grid_w, grid_h, pin_every=3):
+    """Template of a full grid_w x grid_h cloth"""
+    return _cached_template(grid_h, grid_w, None, pin_every)
+
+
+def mask_template(mask, pin_every=3):
+    """Template of the cells set in a 2D boolean mask (rows top to bottom)"""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim != 2:
+        raise ValueError(f"cloth mask must be 2D, not {mask.ndim}D")
+    return _cached_template(mask.shape[0], mask.shape[1], np.packbits(mask).tobytes(), pin_every)
+
+
+def load_mask(path, size=None, threshold=128):
+    """Boolean mask of the pixels of an image whose alpha is at least threshold.
+
+    size is an optional (grid_w, grid_h) the image is resampled to, one
+    particle per pixel; images without alpha give a full rectangle.
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        alpha = image.convert("RGBA").getchannel("A")
+        if size is not None:
+            alpha = alpha.resize(tuple(size), Image.NEAREST)
+        return np.asarray(alpha) >= threshold
+
+
+@contextmanager
+def _gc_paused():
+    """Hold off the cycle collector, which would rescan the growing lists many times over"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def build_particles(x, y, px, py, fx, fy, mass, fixed):
+    """Particle objects from per-particle value lists, skipping __init__ and its jitter"""
+    new = object.__new__
+    particles = []
+    with _gc_paused():
+        for x, y, px, py, fx, fy, mass, fixed in zip(x, y, px, py, fx, fy, mass, fixed):
+            p = new(Particle)
+            p.x = x
+            p.y = y
+            p.px = px
+            p.py = py
+            p.fx = fx
+            p.fy = fy
+            p.fixed = fixed
+            p.mass = mass
+            particles.append(p)
+    return particles
+
+
+def build_springs(particles, i1, i2, rest_length, stiffness, max_stretch):
+    """Spring objects from per-spring value lists, keeping the exact values given"""
+    new = object.__new__
+    springs = []
+    with _gc_paused():
+        for i1, i2, rest_length, stiffness, max_stretch in zip(i1, i2, rest_length, stiffness, max_stretch):
+            s = new(Spring)
+            s.p1 = particles[i1]
+            s.p2 = particles[i2]
+            s.rest_length = rest_length
+            s.spring_constant = stiffness
+            s.max_stretch = max_stretch
+            s.broken = False
+            s.slot = None
+            springs.append(s)
+    return springs
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class TriangleMesh:
+    """Cached triangle index buffer for drawing a cloth grid.
+
+    Each grid cell (i, j) contributes up to two triangles, (p1, p2, p4) and
+    (p1, p4, p3), in the same order the mesh is drawn. A triangle stores the
+    flat indices of its particles and the SpringList slots of its three
+    edges. The buffer is built once per cloth (and after spring compaction);
+    removed springs then only switch off the triangles that use them, so a
+    frame never rebuilds any lookup structure. Cloths cut from a mask pass
+    a grid_index (grid cell -> particle, -1 where empty); cells missing a
+    corner have no triangles.
+    """
+
+    def __init__(self):
+        self.indices = np.zeros((0, 3), dtype=np.int64)
+        self.edge_slots = np.zeros((0, 3), dtype=np.int64)
+        self.parity = np.zeros(0, dtype=bool)
+        self.alive = np.zeros(0, dtype=bool)
+        self._springs = None
+        self._layout_version = None
+        self._removed_seen = 0
+        self._slot_order = np.zeros(0, dtype=np.int64)
+        self._slot_starts = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def sync(self, grid_w, grid_h, springs, grid_index=None):
+        """Bring the buffer up to date with the cloth's springs"""
+        if springs is not self._springs or springs.layout_version != self._layout_version:
+            self._build(grid_w, grid_h, springs, grid_index)
+        elif len(springs.removed) > self._removed_seen:
+            self._remove_slots(springs.removed[self._removed_seen:])
+            self._removed_seen = len(springs.removed)
+
+    def live(self):
+        """Indices and parity of the triangles whose three springs all exist"""
+        return self.indices[self.alive], self.parity[self.alive]
+
+    def _build(self, grid_w, grid_h, springs, grid_index=None):
+        arrays = springs.arrays()
+        n = grid_w * grid_h
+        live_slots = np.flatnonzero(arrays.alive)
+        a = arrays.i1[live_slots]
+        b = arrays.i2[live_slots]
+        keys = np.minimum(a, b) * n + np.maximum(a, b)
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        sorted_slots = live_slots[order]
+
+        # Corners of every cell, row-major, then the two triangles per cell
+        i, j = np.meshgrid(np.arange(grid_h - 1), np.arange(grid_w - 1), indexing="ij")
+        i = i.ravel()
+        j = j.ravel()
+        p1 = i * grid_w + j
+        p2 = p1 + 1
+        p3 = p1 + grid_w
+        p4 = p3 + 1
+        parity = (i + j) % 2 == 1
+        if grid_index is not None:
+            cells = grid_index.ravel()
+            p1, p2, p3, p4 = cells[p1], cells[p2], cells[p3], cells[p4]
+            whole = (p1 >= 0) & (p2 >= 0) & (p3 >= 0) & (p4 >= 0)
+            p1, p2, p3, p4, parity = p1[whole], p2[whole], p3[whole], p4[whole], parity[whole]
+        first = np.stack([p1, p2, p4], axis=1)
+        second = np.stack([p1, p4, p3], axis=1)
+        self.indices = np.stack([first, second], axis=1).reshape(-1, 3)
+        self.parity = np.repeat(parity, 2)
+
+        # Look up the spring slot of each triangle edge (-1 if it doesn't exist)
+        u = self.indices
+        v = np.roll(self.indices, -1, axis=1)
+        edge_keys = np.minimum(u, v) * n + np.maximum(u, v)
+        if len(sorted_keys):
+            pos = np.minimum(np.searchsorted(sorted_keys, edge_keys), len(sorted_keys) - 1)
+            found = sorted_keys[pos] == edge_keys
+            self.edge_slots = np.where(found, sorted_slots[pos], -1)
+        else:
+            found = np.zeros(edge_keys.shape, dtype=bool)
+            self.edge_slots = np.full(edge_keys.shape, -1, dtype=np.int64)
+        self.alive = found.all(axis=1)
+
+        # Slot -> triangles lookup (CSR) for incremental removal
+        flat_slots = self.edge_slots.ravel()
+        valid = flat_slots >= 0
+        self._slot_order = np.flatnonzero(valid)[np.argsort(flat_slots[valid], kind="stable")] // 3
+        counts = np.bincount(flat_slots[valid], minlength=len(springs.slots))
+        self._slot_starts = np.concatenate([[0], np.cumsum(counts)])
+
+        self._springs = springs
+        self._layout_version = springs.layout_version
+        self._removed_seen = len(springs.removed)
+
+    def _remove_slots(self, slots):
+        """Switch off every triangle that uses one of the removed spring slots"""
+        for slot in slots:
+            start, end = self._slot_starts[slot], self._slot_starts[slot + 1]
+            self.alive[self._slot_order[start:end]] = False
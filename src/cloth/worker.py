@@ -0,0 +1,335 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .cloth_system import ClothSystem
+from .self_collision import SelfCollision
+
+# Header slots (int64)
+_FRONT = 0      # buffer holding the newest published state
+_READING = 1    # buffer the render loop is reading; never written by the worker
+_FRAME = 2      # number of states published
+_RUNNING = 3    # cleared to stop the worker
+_CMD_HEAD = 4   # commands pushed (written by the render loop only)
+_CMD_TAIL = 5   # commands consumed (written by the worker only)
+_STEP_NS = 6    # duration of the last physics step
+_HEADER = 8
+
+# The front and back buffers of the double buffer, plus a spare so the worker
+# never has to write into the buffer the render loop is holding
+_BUFFERS = 3
+
+# Command records: opcode followed by up to five arguments
+_MOVE = 1  # particle index, x, y
+_CUT = 2   # x0, y0, x1, y1, radius
+_CMD_FIELDS = 6
+_CMD_CAPACITY = 1024
+
+
+class SharedState:
+    """NumPy views onto the shared memory block of one cloth.
+
+    Layout: int64 header, float64 positions of each buffer (N, 2), the
+    float64 command ring and a uint8 spring-alive flag per slot and buffer.
+    """
+
+    def __init__(self, shm, num_particles, num_slots):
+        buf = shm.buf
+        offset = _HEADER * 8
+        self.header = np.ndarray(_HEADER, dtype=np.int64, buffer=buf)
+        self.positions = np.ndarray((_BUFFERS, num_particles, 2), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.positions.nbytes
+        self.commands = np.ndarray((_CMD_CAPACITY, _CMD_FIELDS), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.commands.nbytes
+        self.alive = np.ndarray((_BUFFERS, num_slots), dtype=np.uint8, buffer=buf, offset=offset)
+
+    @staticmethod
+    def size(num_particles, num_slots):
+        return (_HEADER * 8 + _BUFFERS * num_particles * 2 * 8
+                + _CMD_CAPACITY * _CMD_FIELDS * 8 + _BUFFERS * num_slots)
+
+    def publish(self, positions, alive):
+        """Write a state into a free buffer and make it the front (worker side)"""
+        header = self.header
+        front, reading = header[_FRONT], header[_READING]
+        back = next(b for b in range(_BUFFERS) if b != front and b != reading)
+        self.positions[back] = positions
+        self.alive[back] = alive
+        header[_FRONT] = back
+        header[_FRAME] += 1
+
+    def acquire(self):
+        """Claim the front buffer for reading and return its number (render side)"""
+        header = self.header
+        while True:
+            front = int(header[_FRONT])
+            header[_READING] = front
+            # If the front didn't move meanwhile, the worker saw the claim
+            # before choosing its next back buffer
+            if header[_FRONT] == front:
+                return front
+
+    def push(self, *record):
+        """Queue a command; returns False if the ring is full (render side)"""
+        header = self.header
+        head = int(header[_CMD_HEAD])
+        if head - header[_CMD_TAIL] >= _CMD_CAPACITY:
+            return False
+        row = self.commands[head % _CMD_CAPACITY]
+        row[:] = 0.0
+        row[:len(record)] = record
+        # Publish the record only after it is fully written
+        header[_CMD_HEAD] = head + 1
+        return True
+
+    def drain(self):
+        """Pop every queued command (worker side)"""
+        header = self.header
+        tail = int(header[_CMD_TAIL])
+        head = int(header[_CMD_HEAD])
+        records = [self.commands[i % _CMD_CAPACITY].tolist() for i in range(tail, head)]
+        header[_CMD_TAIL] = head
+        return records
+
+
+def _build_cloth(config):
+    cloth = ClothSystem(solver=config["solver"], seed=config["seed"],
+                        width=config["width"], height=config["height"])
+    cloth.num_iterations = config["num_iterations"]
+    if config["self_collision"] is not None:
+        cloth.self_collision = SelfCollision(**config["self_collision"])
+    cloth.create_cloth(config["grid_w"], config["grid_h"], config["spacing"])
+    return cloth
+
+
+def _run_worker(name, config):
+    """Worker process: step the cloth and publish every state"""
+    shm = shared_memory.SharedMemory(name=name)
+    cloth = _build_cloth(config)
+    # Slot numbers are shared with the render side, so never renumber them
+    cloth.max_dead_ratio = None
+    state = SharedState(shm, len(cloth.flat_particles), len(cloth.springs.slots))
+    header = state.header
+    interval = 1.0 / config["physics_hz"]
+    next_step = time.perf_counter()
+    try:
+        while header[_RUNNING]:
+            for op, a, b, c, d, e in state.drain():
+                if op == _MOVE:
+                    cloth.flat_particles[int(a)].move(b, c)
+                    cloth.particles_changed([int(a)])
+                elif op == _CUT:
+                    cloth.cut_segment(a, b, c, d, e)
+
+            start = time.perf_counter_ns()
+            cloth.update()
+            header[_STEP_NS] = time.perf_counter_ns() - start
+            state.publish(cloth.positions(), cloth.springs.arrays().alive)
+
+            # Hold the physics rate; a slow step just starts the next one late
+            next_step += interval
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_step = time.perf_counter()
+    finally:
+        del state, header
+        shm.close()
+
+
+class RemoteParticle:
+    """Handle to a particle owned by the worker.
+
+    move() sends one move command with both coordinates; setting x or y
+    alone sends a move too, keeping the other coordinate.
+    """
+
+    def __init__(self, worker, index, x, y, fixed):
+        self._worker = worker
+        self.index = index
+        self._x = x
+        self._y = y
+        self.fixed = fixed
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+        self._worker.move_particle(self.index, self._x, self._y)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = value
+        self._worker.move_particle(self.index, self._x, self._y)
+
+    def move(self, x, y):
+        self._x = x
+        self._y = y
+        self._worker.move_particle(self.index, x, y)
+
+
+class ClothWorker:
+    """ClothSystem stepped in a background process.
+
+    The worker publishes every physics state into shared memory and the
+    render loop reads the newest one in place, so drawing never waits on
+    the solver. Grabs are resolved against the latest snapshot; drags and
+    cuts travel to the worker through a single-producer single-consumer
+    ring in the same block, which needs no lock because each side only
+    advances its own counter. Stands in for a ClothSystem wherever the
+    render loop and Interface use one; call close() when done.
+    self_collision is an optional SelfCollision the worker's cloth uses.
+    """
+
+    def __init__(self, solver="numpy", seed=None, width=800, height=800, physics_hz=60, num_iterations=6,
+                 self_collision=None):
+        if physics_hz <= 0:
+            raise ValueError(f"physics_hz must be positive, got {physics_hz!r}")
+        self.WIDTH = width
+        self.HEIGHT = height
+        self.solver = solver
+        self.seed = seed
+        self.physics_hz = physics_hz
+        self.num_iterations = num_iterations
+        self.self_collision = self_collision
+        self.grab_radius = 15
+        self.cut_radius = 20
+        self.dropped_commands = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._shm = None
+        self._state = None
+        self.create_cloth(30, 25, 12)
+
+    def create_cloth(self, grid_w, grid_h, spacing):
+        """Restart the worker on a new cloth grid"""
+        self.close()
+        config = {
+            "grid_w": grid_w, "grid_h": grid_h, "spacing": spacing,
+            "solver": self.solver, "seed": self.seed,
+            "width": self.WIDTH, "height": self.HEIGHT,
+            "num_iterations": self.num_iterations, "physics_hz": self.physics_hz,
+            "self_collision": self.self_collision.settings() if self.self_collision is not None else None,
+        }
+        # Local copy of the cloth for topology; it is never stepped
+        self._mirror = _build_cloth(config)
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.grid_index = None
+        self.springs = self._mirror.springs
+        self.flat_particles = self._mirror.flat_particles
+        self._fixed = np.fromiter((p.fixed for p in self.flat_particles), dtype=bool)
+
+        n, m = len(self.flat_particles), len(self.springs.slots)
+        self._shm = shared_memory.SharedMemory(create=True, size=SharedState.size(n, m))
+        self._state = SharedState(self._shm, n, m)
+        self._state.header[:] = 0
+        self._state.header[_RUNNING] = 1
+        self._state.positions[0] = self._mirror.positions()
+        self._state.alive[0] = self.springs.arrays().alive
+        self._rate_frame = 0
+        self._rate_time = time.perf_counter()
+        self.steps_per_second = 0.0
+
+        self._process = self._context.Process(target=_run_worker, args=(self._shm.name, config), daemon=True)
+        self._process.start()
+
+    def create_strip(self):
+        """Restart the worker on a cloth strip"""
+        self.create_cloth(45, 8, 10)
+
+    def close(self):
+        """Stop the worker and release the shared memory"""
+        if self._process is not None:
+            self._state.header[_RUNNING] = 0
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._shm is not None:
+            self._state = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def positions(self):
+        """Newest published positions as a read-only (N, 2) view, not a copy.
+
+        Also brings the local spring list up to date with the springs the
+        worker has broken or cut, so topology matches the positions.
+        """
+        state = self._state
+        buffer = state.acquire()
+        self._sync_springs(state.alive[buffer])
+        view = state.positions[buffer].view()
+        view.flags.writeable = False
+        return view
+
+    def _sync_springs(self, alive):
+        arrays = self.springs.arrays()
+        slots = self.springs.slots
+        for slot in np.flatnonzero(arrays.alive & (alive == 0)).tolist():
+            self.springs.discard(slots[slot])
+
+    def grab_particle(self, x, y, radius=None):
+        """Nearest particle in the newest snapshot, as a RemoteParticle"""
+        if radius is None:
+            radius = self.grab_radius
+        positions = self.positions()
+        dist_sq = (positions[:, 0] - x) ** 2 + (positions[:, 1] - y) ** 2
+        nearest = int(np.argmin(dist_sq))
+        if dist_sq[nearest] >= radius * radius:
+            return None
+        px, py = positions[nearest].tolist()
+        return RemoteParticle(self, nearest, px, py, bool(self._fixed[nearest]))
+
+    def move_particle(self, index, x, y):
+        self._send(_MOVE, index, x, y)
+
+    def cut_cloth(self, x, y, radius=None):
+        return self.cut_segment(x, y, x, y, radius)
+
+    def cut_segment(self, x0, y0, x1, y1, radius=None):
+        """Queue a cut; the springs disappear once the worker has applied it"""
+        if radius is None:
+            radius = self.cut_radius
+        return self._send(_CUT, x0, y0, x1, y1, radius)
+
+    def _send(self, *record):
+        if not self._state.push(*record):
+            self.dropped_commands += 1
+            return False
+        return True
+
+    def stats(self):
+        published = int(self._state.header[_FRAME])
+        now = time.perf_counter()
+        elapsed = now - self._rate_time
+        if elapsed >= 0.5:
+            self.steps_per_second = (published - self._rate_frame) / elapsed
+            self._rate_frame = published
+            self._rate_time = now
+        return {
+            "published": published,
+            "steps_per_second": self.steps_per_second,
+            "step_ms": int(self._state.header[_STEP_NS]) / 1e6,
+            "dropped_commands": self.dropped_commands,
+        }
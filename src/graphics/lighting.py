@@ -1,28 +1,38 @@
-import pygame
+import math
+
+import numpy as np
+
 
 class Lighting:
     def __init__(self, ambient_light=0.3, specular_intensity=0.4):
         self.ambient_light = ambient_light
         self.specular_intensity = specular_intensity
-        self.light_dir = pygame.Vector2(0.707, -0.707).normalize()
+        light_len = math.sqrt(0.707 * 0.707 + 0.707 * 0.707)
+        self.light_dir = (0.707 / light_len, -0.707 / light_len)
 
     def calculate_lighting(self, p1, p2, p3):
-        edge1 = pygame.Vector2(p2.x - p1.x, p2.y - p1.y)
-        edge2 = pygame.Vector2(p3.x - p1.x, p3.y - p1.y)
+        """Return (diffuse, specular) for one triangle"""
+        e1x, e1y = p2.x - p1.x, p2.y - p1.y
+        e2x, e2y = p3.x - p1.x, p3.y - p1.y
 
-        normal_z = edge1.cross(edge2)
+        # For 2D vectors, cross product is a scalar
+        normal_z = e1x * e2y - e1y * e2x
 
         if abs(normal_z) < 1e-6:
             return self.ambient_light, 0
 
-        normal = pygame.Vector2(-edge1.y, edge1.x) if normal_z > 0 else pygame.Vector2(edge1.y, -edge1.x)
-        normal.normalize_ip()
+        # Normal perpendicular to the first edge, facing the winding side
+        nx, ny = (-e1y, e1x) if normal_z > 0 else (e1y, -e1x)
+        length = math.sqrt(nx * nx + ny * ny)
+        nx, ny = nx / length, ny / length
 
-        diffuse = max(normal.dot(self.light_dir), 0)
+        lx, ly = self.light_dir
+        n_dot_l = nx * lx + ny * ly
+        diffuse = max(n_dot_l, 0)
 
-        view_dir = pygame.Vector2(0, -1)
-        reflect_dir = 2 * normal.dot(self.light_dir) * normal - self.light_dir
-        specular = max(reflect_dir.dot(view_dir), 0) ** 32
+        # Specular against a view direction of (0, -1)
+        reflect_y = 2 * n_dot_l * ny - ly
+        specular = max(-reflect_y, 0) ** 32
         specular *= self.specular_intensity
 
         return self.ambient_light + (1 - self.ambient_light) * diffuse, specular
@@ -31,4 +41,52 @@ class Lighting:
         r = min(255, int(base_color[0] * diffuse) + int(255 * specular))
         g = min(255, int(base_color[1] * diffuse) + int(255 * specular))
         b = min(255, int(base_color[2] * diffuse) + int(255 * specular))
-        return (r, g, b)
\ No newline at end of file
+        return (r, g, b)
+
+    def calculate_lighting_batch(self, p1, p2, p3):
+        """Vectorized calculate_lighting for (T, 2) arrays of triangle corners"""
+        e1x = p2[:, 0] - p1[:, 0]
+        e1y = p2[:, 1] - p1[:, 1]
+        e2x = p3[:, 0] - p1[:, 0]
+        e2y = p3[:, 1] - p1[:, 1]
+        normal_z = e1x * e2y - e1y * e2x
+        flat = np.abs(normal_z) < 1e-6
+
+        sign = np.where(normal_z > 0, 1.0, -1.0)
+        nx = -e1y * sign
+        ny = e1x * sign
+        length = np.sqrt(nx * nx + ny * ny)
+        length[flat] = 1.0
+        nx = nx / length
+        ny = ny / length
+
+        lx, ly = self.light_dir
+        n_dot_l = nx * lx + ny * ly
+        diffuse = np.maximum(n_dot_l, 0)
+
+        reflect_y = 2 * n_dot_l * ny - ly
+        specular = np.maximum(-reflect_y, 0) ** 32
+        specular *= self.specular_intensity
+
+        diffuse = self.ambient_light + (1 - self.ambient_light) * diffuse
+        diffuse[flat] = self.ambient_light
+        specular[flat] = 0.0
+        return diffuse, specular
+
+    def adjust_color_batch(self, base_colors, diffuse, specular):
+        """Vectorized adjust_color; base_colors is (T, 3), returns (T, 3) ints"""
+        lit = (np.asarray(base_colors, dtype=float) * diffuse[:, None]).astype(np.int64)
+        highlight = (255 * specular).astype(np.int64)
+        return np.minimum(255, lit + highlight[:, None])
+
+    def shade(self, positions, triangles, base_colors):
+        """Colors for every triangle in one pass.
+
+        positions is (N, 2), triangles is (T, 3) indices into positions and
+        base_colors is (T, 3). The result matches calculate_lighting plus
+        adjust_color applied to each triangle.
+        """
+        diffuse, specular = self.calculate_lighting_batch(
+            positions[triangles[:, 0]], positions[triangles[:, 1]], positions[triangles[:, 2]]
+        )
+        return self.adjust_color_batch(base_colors, diffuse, specular)
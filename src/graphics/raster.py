@@ -0,0 +1,119 @@
+import numpy as np
+import pygame
+
+
+def map_colors(surface, colors):
+    """Vectorized surface.map_rgb for an (N, 3) array of RGB colors"""
+    colors = np.asarray(colors, dtype=np.int64)
+    shifts = surface.get_shifts()
+    losses = surface.get_losses()
+    mapped = np.zeros(len(colors), dtype=np.int64)
+    for channel in range(3):
+        mapped |= (colors[:, channel] >> losses[channel]) << shifts[channel]
+    # Opaque alpha on surfaces that have an alpha channel
+    if surface.get_masks()[3]:
+        mapped |= (255 >> losses[3]) << shifts[3]
+    return mapped
+
+
+def rasterize_triangles(surface, corners, colors, max_extent=64, chunk_pixels=1 << 21):
+    """Fill many small triangles on a surface in a few NumPy passes.
+
+    corners is a (T, 3, 2) integer array of pixel coordinates and colors a
+    (T, 3) RGB array. Triangles are grouped by bounding-box size, every
+    candidate pixel of a group is tested against the three edge functions
+    at once, and the covered pixels are written through a pixels2d view of
+    the surface. Edges are inclusive like pygame.draw.polygon, and later
+    triangles overwrite earlier ones. Triangles larger than max_extent
+    pixels (badly stretched cloth) fall back to pygame.draw.polygon, drawn
+    between the pixels of the triangles before and after them, so
+    overlapping triangles stack in triangle order as with the polygon path.
+    """
+    corners = np.asarray(corners, dtype=np.int64)
+    if not len(corners):
+        return
+    if surface.get_bytesize() not in (3, 4):
+        for points, color in zip(corners.tolist(), np.asarray(colors).tolist()):
+            pygame.draw.polygon(surface, color, points)
+        return
+
+    width, height = surface.get_size()
+    xs = corners[:, :, 0]
+    ys = corners[:, :, 1]
+    x0, x1 = xs.min(axis=1), xs.max(axis=1)
+    y0, y1 = ys.min(axis=1), ys.max(axis=1)
+    visible = (x1 >= 0) & (y1 >= 0) & (x0 < width) & (y0 < height)
+    extent = np.maximum(x1 - x0, y1 - y0) + 1
+    large = np.flatnonzero(visible & (extent > max_extent))
+    small = np.flatnonzero(visible & (extent <= max_extent))
+
+    # Edge a->b as E(p) = A * px + B * py + C, flipped so the inside is >= 0.
+    # Each edge is evaluated relative to the box corner: E0 + A * ox + B * oy.
+    bx, by = np.roll(xs, -1, axis=1), np.roll(ys, -1, axis=1)
+    a_coef = ys - by
+    b_coef = bx - xs
+    area = a_coef[:, 0] * xs[:, 2] + b_coef[:, 0] * ys[:, 2] - (a_coef[:, 0] * xs[:, 0] + b_coef[:, 0] * ys[:, 0])
+    sign = np.where(area < 0, -1, 1)[:, None]
+    a_coef = (a_coef * sign).astype(np.int32)
+    b_coef = (b_coef * sign).astype(np.int32)
+    e0 = (a_coef * (x0[:, None] - xs) + b_coef * (y0[:, None] - ys)).astype(np.int32)
+    box_w = (x1 - x0).astype(np.int32)
+    box_h = (y1 - y0).astype(np.int32)
+
+    # Bucket by power-of-two box size so each pass tests a fixed S x S block
+    sizes = 1 << np.ceil(np.log2(extent[small])).astype(np.int64)
+    buckets = np.unique(sizes).tolist()
+    tri_parts = []
+    x_parts = []
+    y_parts = []
+    for size in buckets:
+        group = small[sizes == size]
+        oy, ox = np.divmod(np.arange(size * size, dtype=np.int32), size)
+        step = max(1, chunk_pixels // (size * size))
+        for start in range(0, len(group), step):
+            ids = group[start:start + step]
+            ga, gb, ge = a_coef[ids], b_coef[ids], e0[ids]
+            inside = (ox <= box_w[ids, None]) & (oy <= box_h[ids, None])
+            edge = np.empty(inside.shape, dtype=np.int32)
+            term = np.empty(inside.shape, dtype=np.int32)
+            test = np.empty(inside.shape, dtype=bool)
+            for e in range(3):
+                np.multiply(ga[:, e, None], ox, out=edge)
+                np.multiply(gb[:, e, None], oy, out=term)
+                edge += term
+                edge += ge[:, e, None]
+                np.greater_equal(edge, 0, out=test)
+                inside &= test
+            rows, cols = np.nonzero(inside)
+            tri_parts.append(ids[rows])
+            x_parts.append(x0[ids[rows]] + ox[cols])
+            y_parts.append(y0[ids[rows]] + oy[cols])
+
+    tris = np.concatenate(tri_parts) if tri_parts else np.zeros(0, dtype=np.int64)
+    px = np.concatenate(x_parts) if tri_parts else np.zeros(0, dtype=np.int64)
+    py = np.concatenate(y_parts) if tri_parts else np.zeros(0, dtype=np.int64)
+    clipped = (x0[small] < 0) | (y0[small] < 0) | (x1[small] >= width) | (y1[small] >= height)
+    if clipped.any():
+        on_screen = (px >= 0) & (py >= 0) & (px < width) & (py < height)
+        tris, px, py = tris[on_screen], px[on_screen], py[on_screen]
+    if len(buckets) > 1 or len(large):
+        # Write in triangle order so later triangles win, as with the polygon path
+        order = np.argsort(tris, kind="stable")
+        tris, px, py = tris[order], px[order], py[order]
+
+    mapped = map_colors(surface, colors)
+    colors = np.asarray(colors)
+    start = 0
+    for t, end in zip(large.tolist(), np.searchsorted(tris, large).tolist()):
+        _write_pixels(surface, px[start:end], py[start:end], mapped[tris[start:end]])
+        pygame.draw.polygon(surface, colors[t].tolist(), corners[t].tolist())
+        start = end
+    _write_pixels(surface, px[start:], py[start:], mapped[tris[start:]])
+
+
+def _write_pixels(surface, px, py, values):
+    """Set pixels through a pixels2d view; later entries win where pixels repeat"""
+    if len(px):
+        view = pygame.surfarray.pixels2d(surface)
+        view[px, py] = values
+        del view  # unlock the surface
@@ -1,49 +1,147 @@
+from functools import partial
+
+import numpy as np
 import pygame
-from src.graphics.lighting import calculate_lighting
-from src.cloth.particle import Particle
-from src.cloth.spring import Spring
+
+from cloth.profiler import Profiler
+from cloth.triangles import TriangleMesh
+from .lighting import Lighting
+from .raster import rasterize_triangles
+
 
 class Renderer:
+    """Base render backend.
+
+    A renderer draws a ClothSystem onto its screen surface; the simulation
+    itself owns no drawing code. draw() takes an optional (N, 2) positions
+    array in flat_particles order so callers can render interpolated or
+    snapshotted state instead of the live particle positions.
+    """
+
+    particle_color = (255, 255, 255)
+    spring_color = (158, 98, 204)
+    margin = 5  # Pixels painted beyond the particle positions (particle radius, line width)
+
     def __init__(self, screen):
         self.screen = screen
+        self.profiler = Profiler()  # Replaced by the application's profiler to time drawing
+
+    def draw(self, cloth_system, positions=None):
+        raise NotImplementedError
+
+    def bounds(self, positions):
+        """Screen rect covering everything draw() paints for positions, or None"""
+        finite = positions[np.isfinite(positions).all(axis=1)]
+        if not len(finite):
+            return None
+        left, top = np.floor(finite.min(axis=0)).astype(int) - self.margin
+        right, bottom = np.ceil(finite.max(axis=0)).astype(int) + self.margin
+        return pygame.Rect(left, top, right - left + 1, bottom - top + 1).clip(self.screen.get_rect())
+
+    def draw_particles(self, positions, radius=4):
+        for point in positions.astype(np.int64).tolist():
+            pygame.draw.circle(self.screen, self.particle_color, point, radius)
+
+    def draw_springs(self, positions, springs):
+        arrays = springs.arrays()
+        live = np.flatnonzero(arrays.alive)
+        points = positions.astype(np.int64)
+        starts = points[arrays.i1[live]].tolist()
+        ends = points[arrays.i2[live]].tolist()
+        for start, end in zip(starts, ends):
+            pygame.draw.line(self.screen, self.spring_color, start, end, 2)
+
+
+class MeshRenderer(Renderer):
+    """Lit, two-tone triangle mesh.
+
+    fill selects how triangles are filled: "polygon" issues one
+    pygame.draw.polygon per triangle, "raster" rasterizes them all into the
+    surface with NumPy (see graphics.raster).
+    """
+
+    def __init__(self, screen, fill="polygon", lighting=None):
+        super().__init__(screen)
+        self.fill = fill
+        self.lighting = lighting or Lighting(ambient_light=0.3, specular_intensity=0.4)
+        self.cloth_color_a = (158, 98, 204)
+        self.cloth_color_b = (130, 80, 200)
+        self.triangles = TriangleMesh()
+
+    def draw(self, cloth_system, positions=None):
+        if positions is None:
+            positions = cloth_system.positions()
+        # Cloths that aren't a grid have no triangles to fill
+        if cloth_system.grid_w < 2 or cloth_system.grid_h < 2:
+            self.draw_springs(positions, cloth_system.springs)
+            return
+        self.draw_cloth(positions, cloth_system.grid_w, cloth_system.grid_h, cloth_system.springs,
+                        cloth_system.grid_index)
+
+    def draw_cloth(self, positions, grid_w, grid_h, springs, grid_index=None):
+        """Draw every triangle whose three springs still exist"""
+        stage = self.profiler.stage
+        with stage("mesh"):
+            self.triangles.sync(grid_w, grid_h, springs, grid_index)
+            indices, parity = self.triangles.live()
+        self.profiler.count("triangles", len(indices))
+        if not len(indices):
+            return
+
+        with stage("shading"):
+            base_colors = np.where(parity[:, None], self.cloth_color_a, self.cloth_color_b)
+            colors = self.lighting.shade(positions, indices, base_colors)
+
+        # Particle.pos() truncates to integer pixels
+        with stage("fill"):
+            corners = positions.astype(np.int64)[indices]
+            if self.fill == "raster":
+                rasterize_triangles(self.screen, corners, colors)
+                return
+            for points, color in zip(corners.tolist(), colors.tolist()):
+                pygame.draw.polygon(self.screen, color, points)
+
+
+class WireframeRenderer(Renderer):
+    """Live springs drawn as lines"""
+
+    def draw(self, cloth_system, positions=None):
+        if positions is None:
+            positions = cloth_system.positions()
+        self.draw_springs(positions, cloth_system.springs)
+
+
+class ParticleRenderer(Renderer):
+    """Particles only"""
+
+    def draw(self, cloth_system, positions=None):
+        if positions is None:
+            positions = cloth_system.positions()
+        self.draw_particles(positions)
+
+
+class NullRenderer(Renderer):
+    """Draws nothing; for headless runs and measuring simulation cost alone"""
+
+    def draw(self, cloth_system, positions=None):
+        pass
+
+    def bounds(self, positions):
+        return None
+
+
+RENDERERS = {
+    "mesh": MeshRenderer,
+    "raster": partial(MeshRenderer, fill="raster"),
+    "wireframe": WireframeRenderer,
+    "particles": ParticleRenderer,
+    "null": NullRenderer,
+}
+
 
-    def draw_cloth(self, particles, springs):
-        connections = set()
-        for s in springs:
-            connections.add((s.p1, s.p2))
-            connections.add((s.p2, s.p1))
-
-        for i in range(len(particles) - 1):
-            for j in range(len(particles[i]) - 1):
-                p1 = particles[i][j]
-                p2 = particles[i][j + 1]
-                p3 = particles[i + 1][j]
-                p4 = particles[i + 1][j + 1]
-
-                # Draw triangles as solid color with lighting
-                if (p1, p2) in connections and (p2, p4) in connections and (p1, p4) in connections:
-                    self.draw_triangle(p1, p2, p4)
-
-                if (p1, p4) in connections and (p4, p3) in connections and (p1, p3) in connections:
-                    self.draw_triangle(p1, p4, p3)
-
-    def draw_triangle(self, p1, p2, p3):
-        # Calculate lighting and color for the triangle
-        diffuse, specular = calculate_lighting(p1, p2, p3)
-        color = self.adjust_color((255, 255, 255), diffuse, specular)
-        pygame.draw.polygon(self.screen, color, [p1.pos(), p2.pos(), p3.pos()])
-
-    def adjust_color(self, base_color, diffuse, specular):
-        r = min(255, int(base_color[0] * diffuse) + int(255 * specular))
-        g = min(255, int(base_color[1] * diffuse) + int(255 * specular))
-        b = min(255, int(base_color[2] * diffuse) + int(255 * specular))
-        return (r, g, b)
-
-    def draw_particles(self, particles):
-        for row in particles:
-            for p in row:
-                pygame.draw.circle(self.screen, (255, 255, 255), p.pos(), 4)
-
-    def draw_springs(self, springs):
-        for s in springs:
-            pygame.draw.line(self.screen, (158, 98, 204), s.p1.pos(), s.p2.pos(), 2)
\ No newline at end of file
+def create_renderer(name, screen):
+    """Build the render backend registered under name"""
+    try:
+        return RENDERERS[name](screen)
+    except KeyError:
+        raise ValueError(f"unknown renderer {name!r}, expected one of {', '.join(RENDERERS)}")
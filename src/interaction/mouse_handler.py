@@ -42,7 +42,7 @@ class MouseHandler:
     def _cut_cloth(self, particle):
         # Logic to cut the cloth at the particle's position
         # This could involve removing springs connected to the particle
-        for spring in self.springs[:]:
+        for spring in list(self.springs):
             if spring.p1 == particle or spring.p2 == particle:
                 self.springs.remove(spring)  # Remove the spring to simulate cutting
 
@@ -1,4 +1,8 @@
-def select_particle(particles, mouse_pos, drag_radius):
+def select_particle(particles, mouse_pos, drag_radius, index=None):
+    # Use the cloth's spatial index when given (see ClothSystem.spatial_index)
+    if index is not None:
+        return index.nearest_particle(mouse_pos[0], mouse_pos[1], drag_radius)
+
     closest_particle = None
     min_dist = float('inf')
 
@@ -1,8 +1,45 @@
+import argparse
+import random
 import pygame
-from cloth.cloth_system import ClothSystem
+from cloth.cloth_system import SOLVERS, ClothSystem
+from cloth.profiler import Profiler
+from cloth.self_collision import SelfCollision
+from cloth.session import SessionRecorder
+from cloth.timestep import FixedTimestep
+from cloth.worker import ClothWorker
+from graphics.renderer import RENDERERS, create_renderer
 from ui.interface import Interface
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enhanced Cloth Simulation")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="mesh",
+                        help="render backend (default: mesh)")
+    parser.add_argument("--solver", choices=SOLVERS, default="python",
+                        help="physics solver backend (default: python)")
+    parser.add_argument("--fps", type=int, default=60, help="render frame rate cap (0 = uncapped)")
+    parser.add_argument("--physics-hz", type=int, default=60, help="fixed physics step rate")
+    parser.add_argument("--max-substeps", type=int, default=5,
+                        help="most physics steps per frame before time is dropped")
+    parser.add_argument("--worker", action="store_true",
+                        help="step physics in a background process instead of between frames")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the initial particle jitter")
+    parser.add_argument("--self-collision", action="store_true",
+                        help="keep pieces of cloth from passing through each other")
+    parser.add_argument("--record-session", metavar="PATH", default=None,
+                        help="log the interactions for headless replay with python -m cloth.session")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="redraw and flip the whole window every frame instead of only changed areas")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="profile every frame and write the stage timings to PATH (.csv or JSON lines)")
+    args = parser.parse_args()
+    if args.physics_hz <= 0:
+        parser.error("--physics-hz must be positive")
+    if args.record_session and args.worker:
+        parser.error("--record-session needs the physics in this process (no --worker)")
+    return args
+
 def main():
+    args = parse_args()
     pygame.init()
 
     # Screen dimensions
@@ -11,33 +48,101 @@ def main():
     pygame.display.set_caption("Enhanced Cloth Simulation")
 
     # Initialize cloth simulation
-    cloth_system = ClothSystem()
+    self_collision = SelfCollision() if args.self_collision else None
+    if args.worker:
+        cloth_system = ClothWorker(solver=args.solver, seed=args.seed, physics_hz=args.physics_hz,
+                                   self_collision=self_collision)
+    else:
+        seed = args.seed
+        if seed is None and args.record_session:
+            seed = random.randrange(2**32)  # Replay rebuilds the cloth from the seed
+        cloth_system = ClothSystem(solver=args.solver, seed=seed)
+        cloth_system.self_collision = self_collision
+    renderer = create_renderer(args.renderer, screen)
     interface = Interface()
+    if args.record_session:
+        interface.session = SessionRecorder(args.record_session, cloth_system)
+    timestep = FixedTimestep(args.physics_hz, args.max_substeps)
+
+    # One profiler shared by physics, rendering and UI; on while exporting or the overlay (P) is shown
+    profiler = Profiler(enabled=args.profile is not None, export=args.profile)
+    cloth_system.profiler = renderer.profiler = interface.profiler = profiler
+    stage = profiler.stage
 
     # Main loop
     clock = pygame.time.Clock()
     running = True
+    frame_time = 0.0
+    report_time = 0.0
+    background = (18, 22, 40)
+    cloth_rect = None  # Area the cloth was drawn in last frame
+    full_redraw = True  # The first frame draws everything
 
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            # Handle mouse interactions
-            interface.handle_event(event, cloth_system)
+        with stage("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                # Handle mouse interactions
+                interface.handle_event(event, cloth_system)
 
-        # Update the cloth simulation
-        cloth_system.update()
+        with stage("physics"):
+            if args.worker:
+                # The worker steps on its own; draw its newest published state, one snapshot per frame
+                positions = cloth_system.positions()
+            else:
+                # Step the cloth simulation at its own fixed rate
+                timestep.run(cloth_system, frame_time)
+                positions = timestep.interpolated_positions(cloth_system)
 
-        # Render everything
-        screen.fill((18, 22, 40))  # Background color
-        cloth_system.draw(screen)
-        interface.draw(screen)
+        if full_redraw or args.full_redraw:
+            # Render everything
+            with stage("render"):
+                screen.fill(background)
+                renderer.draw(cloth_system, positions=positions)
+            with stage("ui"):
+                interface.draw(screen)
+            cloth_rect = renderer.bounds(positions)
+            full_redraw = False
+            with stage("flip"):
+                pygame.display.flip()
+        else:
+            # Clear and redraw only where the cloth, cursor or panel were or are now
+            with stage("render"):
+                dirty = interface.damaged_rects()
+                last_cloth_rect, cloth_rect = cloth_rect, renderer.bounds(positions)
+                dirty += [rect for rect in (last_cloth_rect, cloth_rect) if rect is not None]
+                for rect in dirty:
+                    screen.fill(background, rect)
+                renderer.draw(cloth_system, positions=positions)
+            with stage("ui"):
+                # Buttons are redrawn only when their state changes or the cleared areas overlap them
+                dirty += interface.draw(screen, dirty)
+            with stage("flip"):
+                pygame.display.update(dirty)
+        with stage("wait"):
+            frame_time = clock.tick(args.fps) / 1000.0
+        profiler.end_frame()
 
-        pygame.display.flip()
-        clock.tick(60)
+        # Report frame rate and dropped/substepped frames once a second
+        report_time += frame_time
+        if report_time >= 1.0:
+            report_time = 0.0
+            if args.worker:
+                stats = cloth_system.stats()
+                detail = f"{stats['steps_per_second']:.0f} physics steps/s in worker"
+            else:
+                stats = timestep.stats()
+                detail = f"{stats['substepped_frames']} substepped, {stats['dropped_frames']} dropped frames"
+            pygame.display.set_caption(f"Enhanced Cloth Simulation - {clock.get_fps():.0f} fps, {detail}")
 
+    if args.worker:
+        cloth_system.close()
+    if interface.session is not None:
+        interface.session.close()
+    profiler.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
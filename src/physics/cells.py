@@ -0,0 +1,31 @@
+"""Cell keys of the uniform grids used for spatial queries and collision.
+
+A cell (cx, cy) is packed into one int64 key, with an offset that keeps
+both coordinates positive, so keys sort by column and then row and the
+neighbours of a cell are a fixed key offset away. Every grid builds its
+keys here so they all share one layout.
+"""
+import numpy as np
+
+_OFFSET = 1 << 20
+_STRIDE = 1 << 21
+
+
+def cell_coords(v, cell_size):
+    """Integer cell coordinates of values along one axis"""
+    return np.floor(np.asarray(v) / cell_size).astype(np.int64)
+
+
+def pack(cx, cy):
+    """Key of the cell at integer coordinates (cx, cy)"""
+    return (cx + _OFFSET) * _STRIDE + (cy + _OFFSET)
+
+
+def cell_keys(x, y, cell_size):
+    """Key of the cell each point (x, y) falls in"""
+    return pack(cell_coords(x, cell_size), cell_coords(y, cell_size))
+
+
+def shift(keys, dx, dy):
+    """Keys of the cells dx columns and dy rows away"""
+    return keys + dx * _STRIDE + dy
@@ -0,0 +1,167 @@
+"""Broad and narrow phase kernels for cloth self-collision.
+
+The broad phase buckets points into a uniform grid and pairs up points in
+the same or neighbouring cells; segments go into every cell their padded
+bounding box overlaps and meet the points of those cells. Everything runs
+as sorted-array passes, so the cost
+grows with the number of points and nearby pairs rather than with n^2.
+The narrow phase resolves the pairs that actually touch with Jacobi-style
+position corrections weighted by inverse mass.
+"""
+import numpy as np
+
+from .cells import cell_coords, pack, shift
+
+# Half of the cells around a cell (itself included); finds each unordered pair once
+HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class Grid:
+    """Entries sorted by cell key (see physics.cells), with the range of each occupied cell"""
+
+    def __init__(self, keys):
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.starts, self.counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+
+def segment_cells(x0, y0, x1, y1, pad, cell_size):
+    """(segment index, cell key) for every cell the padded bounding box of each segment overlaps"""
+    lo_x = cell_coords(np.minimum(x0, x1) - pad, cell_size)
+    lo_y = cell_coords(np.minimum(y0, y1) - pad, cell_size)
+    span_x = cell_coords(np.maximum(x0, x1) + pad, cell_size) - lo_x + 1
+    span_y = cell_coords(np.maximum(y0, y1) + pad, cell_size) - lo_y + 1
+    counts = span_x * span_y
+    owner = np.repeat(np.arange(len(counts)), counts)
+    t = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = lo_x[owner] + t // span_y[owner]
+    cy = lo_y[owner] + t % span_y[owner]
+    return owner, pack(cx, cy)
+
+
+def _expand(starts_a, counts_a, starts_b, counts_b):
+    """Every (a, b) combination of two lists of [start, start + count) ranges"""
+    sizes = counts_a * counts_b
+    owner = np.repeat(np.arange(len(sizes)), sizes)
+    t = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    per_b = counts_b[owner]
+    return starts_a[owner] + t // per_b, starts_b[owner] + t % per_b
+
+
+def grid_pairs(grid_a, grid_b, offsets, same=False):
+    """Index pairs (i, j) of points in cells of grid_a and cells of grid_b offset by offsets.
+
+    With same (grid_b is grid_a, offsets HALF_NEIGHBOURS) each unordered
+    pair of distinct points comes out once, with i < j.
+    """
+    first, second = [], []
+    for dx, dy in offsets:
+        wanted = shift(grid_a.keys, dx, dy)
+        slots = np.searchsorted(grid_b.keys, wanted)
+        slots[slots == len(grid_b.keys)] = 0
+        hit = grid_b.keys[slots] == wanted if len(grid_b.keys) else np.zeros(len(wanted), dtype=bool)
+        a, b = _expand(grid_a.starts[hit], grid_a.counts[hit], grid_b.starts[slots[hit]], grid_b.counts[slots[hit]])
+        i, j = grid_a.order[a], grid_b.order[b]
+        if same and dx == 0 and dy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        first.append(i)
+        second.append(j)
+    i, j = np.concatenate(first), np.concatenate(second)
+    if same:
+        i, j = np.minimum(i, j), np.maximum(i, j)
+    return i, j
+
+
+def pair_keys(i, j, n):
+    """One int64 key per unordered pair of indices below n"""
+    return np.minimum(i, j) * n + np.maximum(i, j)
+
+
+def contains(sorted_keys, keys):
+    """Mask of keys found in the sorted key array"""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    slots = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[slots] == keys
+
+
+def close_points(x, y, i, j, thickness):
+    """Mask of point pairs (i, j) closer than thickness"""
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    return dx * dx + dy * dy < thickness * thickness
+
+
+def close_segments(x, y, p, a, b, thickness):
+    """Mask of points p closer than thickness to segments (a, b)"""
+    ex = x[b] - x[a]
+    ey = y[b] - y[a]
+    length_sq = ex * ex + ey * ey
+    t = np.clip(((x[p] - x[a]) * ex + (y[p] - y[a]) * ey) / np.where(length_sq > 0, length_sq, 1.0), 0.0, 1.0)
+    nx = x[p] - (x[a] + t * ex)
+    ny = y[p] - (y[a] + t * ey)
+    return nx * nx + ny * ny < thickness * thickness
+
+
+def _apply(x, y, moves_x, moves_y, counts):
+    """Add the averaged corrections to the particles that received any"""
+    moved = counts > 0
+    x[moved] += moves_x[moved] / counts[moved]
+    y[moved] += moves_y[moved] / counts[moved]
+
+
+def resolve_particles(x, y, inv_mass, i, j, thickness):
+    """Push apart particle pairs closer than thickness; return the number of contacts"""
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    dist = np.hypot(dx, dy)
+    w = inv_mass[i] + inv_mass[j]
+    hit = (dist < thickness) & (w > 0)
+    if not hit.any():
+        return 0
+    i, j, dx, dy, dist, w = i[hit], j[hit], dx[hit], dy[hit], dist[hit], w[hit]
+
+    # Coincident particles are separated along x
+    degenerate = dist < 1e-9
+    safe = np.where(degenerate, 1.0, dist)
+    nx = np.where(degenerate, 1.0, dx / safe)
+    ny = np.where(degenerate, 0.0, dy / safe)
+    lam = (thickness - dist) / w
+
+    n = len(x)
+    cx, cy = nx * lam, ny * lam
+    wi, wj = inv_mass[i], inv_mass[j]
+    moves_x = np.bincount(j, weights=cx * wj, minlength=n) - np.bincount(i, weights=cx * wi, minlength=n)
+    moves_y = np.bincount(j, weights=cy * wj, minlength=n) - np.bincount(i, weights=cy * wi, minlength=n)
+    counts = np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+    _apply(x, y, moves_x, moves_y, counts)
+    return len(i)
+
+
+def resolve_edges(x, y, inv_mass, p, a, b, thickness):
+    """Push particles p out of edges (a, b) they are closer to than thickness; return the contact count"""
+    ex = x[b] - x[a]
+    ey = y[b] - y[a]
+    length_sq = ex * ex + ey * ey
+    t = np.clip(((x[p] - x[a]) * ex + (y[p] - y[a]) * ey) / np.where(length_sq > 0, length_sq, 1.0), 0.0, 1.0)
+    nx = x[p] - (x[a] + t * ex)
+    ny = y[p] - (y[a] + t * ey)
+    dist = np.hypot(nx, ny)
+    w = inv_mass[p] + inv_mass[a] * (1 - t) ** 2 + inv_mass[b] * t * t
+    hit = (dist < thickness) & (dist > 1e-9) & (w > 0)
+    if not hit.any():
+        return 0
+    p, a, b, t, nx, ny, dist, w = p[hit], a[hit], b[hit], t[hit], nx[hit], ny[hit], dist[hit], w[hit]
+
+    # Move the particle out along the normal and the edge the other way, split by barycentric weight
+    lam = (thickness - dist) / (dist * w)
+    cx, cy = nx * lam, ny * lam
+    n = len(x)
+    wp, wa, wb = inv_mass[p], inv_mass[a] * (1 - t), inv_mass[b] * t
+    moves_x = (np.bincount(p, weights=cx * wp, minlength=n) - np.bincount(a, weights=cx * wa, minlength=n)
+               - np.bincount(b, weights=cx * wb, minlength=n))
+    moves_y = (np.bincount(p, weights=cy * wp, minlength=n) - np.bincount(a, weights=cy * wa, minlength=n)
+               - np.bincount(b, weights=cy * wb, minlength=n))
+    counts = np.bincount(p, minlength=n) + np.bincount(a, minlength=n) + np.bincount(b, minlength=n)
+    _apply(x, y, moves_x, moves_y, counts)
+    return len(p)
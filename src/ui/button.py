@@ -1,4 +1,5 @@
 import pygame
+from .fonts import get_font, render_label
 
 class Button:
     def __init__(self, x, y, width, height, text, action):
@@ -7,21 +8,38 @@ class Button:
         self.hover_color = (60, 65, 80)
         self.active_color = (70, 90, 120)
         self.text = text
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(None, 24)
         self.action = action
         self.hover = False
+        self.drawn_state = None  # State of the image last drawn, to tell when a redraw is due
+        self._images = {}  # Pre-rendered button per state
+
+    def state(self, active=False):
+        return "active" if active else ("hover" if self.hover else "normal")
+
+    def needs_redraw(self, active=False):
+        """Whether the hover/active state changed since the button was last drawn"""
+        return self.state(active) != self.drawn_state
+
+    def _image(self, state):
+        image = self._images.get(state)
+        if image is None:
+            # Choose color based on state
+            color = {"active": self.active_color, "hover": self.hover_color, "normal": self.normal_color}[state]
+            image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(image, color, image.get_rect(), border_radius=4)
+            text_surface = render_label(self.text)
+            image.blit(text_surface, (
+                (self.rect.width - text_surface.get_width()) // 2,
+                (self.rect.height - text_surface.get_height()) // 2)
+            )
+            self._images[state] = image
+        return image
 
     def draw(self, screen, active=False):
-        # Choose color based on state
-        color = self.active_color if active else (self.hover_color if self.hover else self.normal_color)
-        
-        # Draw button
-        pygame.draw.rect(screen, color, self.rect, border_radius=4)
-        text_surface = self.font.render(self.text, True, (255, 255, 255))
-        screen.blit(text_surface, (
-            self.rect.x + (self.rect.width - text_surface.get_width()) // 2,
-            self.rect.y + (self.rect.height - text_surface.get_height()) // 2)
-        )
+        state = self.state(active)
+        screen.blit(self._image(state), self.rect)
+        self.drawn_state = state
         
         # Update hover state
         mx, my = pygame.mouse.get_pos()
@@ -30,4 +48,4 @@ class Button:
     def is_clicked(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             return self.rect.collidepoint(event.pos)
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+import pygame
+
+
+@lru_cache(maxsize=None)
+def get_font(name=None, size=24):
+    """Shared Font instance for a font name (None = pygame default) and size"""
+    return pygame.font.Font(name, size)
+
+
+@lru_cache(maxsize=None)
+def get_sys_font(name, size):
+    """Shared system font, e.g. "monospace" for aligned columns"""
+    return pygame.font.SysFont(name, size)
+
+
+@lru_cache(maxsize=256)
+def render_label(text, color=(255, 255, 255), size=24):
+    """Pre-rendered antialiased label in the default font; treat the surface as read-only"""
+    return get_font(None, size).render(text, True, color)
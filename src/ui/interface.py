@@ -1,5 +1,8 @@
 import pygame
+from cloth.profiler import Profiler
+from cloth.session import CLOTH_SHAPES
 from .button import Button
+from .fonts import get_font, get_sys_font
 
 class Interface:
     def __init__(self):
@@ -7,6 +10,7 @@ class Interface:
         self.HEIGHT = 800
         self.buttons = self._create_buttons()
         self.dragging_particle = None
+        self.cut_last_pos = None  # Previous mouse position while a cut stroke is held
         self.current_tool = "grab"  # "grab" or "cut"
         self.tool_buttons = self._create_tool_buttons()
         self.option_buttons = self._create_option_buttons()
@@ -14,13 +18,22 @@ class Interface:
         self.button_color = (40, 45, 60)
         self.tool_button_size = (50, 30)
         self.tool_area = pygame.Rect(290, self.HEIGHT-50, 110, 30)
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(None, 24)
+        self.session = None  # SessionRecorder the interactions are logged to, or None
+        self.profiler = Profiler()  # Shared with the cloth and renderer by the application
+        self.show_profile = False
+        self.profile_font = get_sys_font("monospace", 14)  # Columns line up
+        self._profile_panel = None
+        self._profile_frame = None
+        # Where the cursor and profile panel were last drawn, for dirty-rect redraws
+        self._cursor_rect = None
+        self._panel_rect = None
     
     def _create_buttons(self):
         """Create cloth type buttons"""
         return [
-            Button(20, self.HEIGHT-50, 80, 30, "Cloth", lambda cs: cs.create_cloth(30, 25, 12)),
-            Button(110, self.HEIGHT-50, 80, 30, "Strip", lambda cs: cs.create_strip()),
+            Button(20, self.HEIGHT-50, 80, 30, "Cloth", CLOTH_SHAPES["cloth"]),
+            Button(110, self.HEIGHT-50, 80, 30, "Strip", CLOTH_SHAPES["strip"]),
         ]
     
     def _create_tool_buttons(self):
@@ -32,18 +45,35 @@ class Interface:
     
     def _create_option_buttons(self):
         """Create option buttons"""
-        return []
+        return [
+            Button(self.WIDTH-80, self.HEIGHT-50, 60, 30, "Stats", lambda cs: self.toggle_profile()),
+        ]
+
+    def toggle_profile(self):
+        """Show or hide the profiling overlay; profiling runs while it is shown"""
+        self.show_profile = not self.show_profile
+        self.profiler.enabled = self.show_profile or self.profiler.exporting
+        self._profile_frame = None
     
     def _set_tool(self, tool):
         self.current_tool = tool
+        self.cut_last_pos = None
+        self._log("tool", tool=tool)
+
+    def _log(self, kind, **data):
+        """Log an interaction to the session recorder, if there is one"""
+        if self.session is not None:
+            self.session.log(kind, **data)
     
     def handle_event(self, event, cloth_system):
         """Handle user input events"""
         # Handle cloth selection buttons
         for button in self.buttons:
             if button.is_clicked(event):
+                self._log("reset", cloth=button.text.lower())
                 button.action(cloth_system)
                 self.dragging_particle = None
+                self.cut_last_pos = None
                 return
         
         # Handle tool selection buttons
@@ -58,6 +88,10 @@ class Interface:
                 button.action(cloth_system)
                 return
                 
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+            self.toggle_profile()
+            return
+
         # Handle mouse interaction with cloth
         if event.type == pygame.MOUSEBUTTONDOWN:
             mx, my = event.pos
@@ -68,38 +102,104 @@ class Interface:
                 
             # Handle based on current tool
             if self.current_tool == "grab":
+                self._log("grab", x=mx, y=my)
                 self.dragging_particle = cloth_system.grab_particle(mx, my)
             elif self.current_tool == "cut":
+                self._log("cut", x0=mx, y0=my, x1=mx, y1=my)
                 cloth_system.cut_cloth(mx, my)
+                self.cut_last_pos = (mx, my)
                 
         elif event.type == pygame.MOUSEBUTTONUP:
+            if self.dragging_particle or self.cut_last_pos:
+                self._log("release")
             self.dragging_particle = None
+            self.cut_last_pos = None
+        
+        # Sweep the cut along the mouse path so fast strokes don't skip springs
+        elif event.type == pygame.MOUSEMOTION and self.cut_last_pos and self.current_tool == "cut":
+            mx, my = event.pos
+            lx, ly = self.cut_last_pos
+            self._log("cut", x0=lx, y0=ly, x1=mx, y1=my)
+            cloth_system.cut_segment(lx, ly, mx, my)
+            self.cut_last_pos = (mx, my)
         
         # Update the grabbed particle position
         if self.dragging_particle and not self.dragging_particle.fixed:
             mx, my = pygame.mouse.get_pos()
-            self.dragging_particle.x = mx
-            self.dragging_particle.y = my
+            self._log("move", x=mx, y=my)
+            self.dragging_particle.move(mx, my)
     
-    def draw(self, screen):
-        """Draw the interface"""
-        # Draw cloth type buttons
-        for button in self.buttons:
-            button.draw(screen)
-            
-        # Draw tool buttons
-        for button in self.tool_buttons:
-            button.draw(screen, button.text.lower() == self.current_tool)
-        
-        # Draw option buttons
-        for button in self.option_buttons:
-            button.draw(screen)
+    def _button_states(self):
+        """Every button with whether it is drawn as active"""
+        return ([(button, False) for button in self.buttons]
+                + [(button, button.text.lower() == self.current_tool) for button in self.tool_buttons]
+                + [(button, False) for button in self.option_buttons])
+
+    def _cursor_bounds(self, pos):
+        radius = 21  # Largest tool cursor plus its outline
+        return pygame.Rect(pos[0] - radius, pos[1] - radius, 2 * radius + 1, 2 * radius + 1)
+
+    def damaged_rects(self):
+        """Rects to clear before a dirty-rect draw: the cursor and profile panel, old and new"""
+        rects = [rect for rect in (self._cursor_rect, self._panel_rect) if rect is not None]
+        rects.append(self._cursor_bounds(pygame.mouse.get_pos()))
+        if self.show_profile:
+            rects.append(self._refresh_profile().get_rect(topleft=(10, 10)))
+        return rects
+
+    def draw(self, screen, dirty=None):
+        """Draw the interface and return the rects drawn over.
+
+        With dirty, the rects already cleared and redrawn this frame, only
+        buttons that changed state or overlap them are redrawn; the cursor
+        and profile panel are always drawn.
+        """
+        mouse = pygame.mouse.get_pos()
+        drawn = []
+        for button, active in self._button_states():
+            if dirty is None or button.needs_redraw(active) or button.rect.collidelist(dirty) != -1:
+                button.draw(screen, active)
+                drawn.append(button.rect)
+            else:
+                button.hover = button.rect.collidepoint(mouse)
         
         # Draw cursor based on tool
-        mx, my = pygame.mouse.get_pos()
+        mx, my = mouse
         if self.current_tool == "grab":
             pygame.draw.circle(screen, (200, 200, 255, 128), (mx, my), 15, 1)
         elif self.current_tool == "cut":
             pygame.draw.circle(screen, (255, 100, 100, 128), (mx, my), 20, 1)
             pygame.draw.line(screen, (255, 100, 100), (mx-15, my), (mx+15, my), 1)
-            pygame.draw.line(screen, (255, 100, 100), (mx, my-15), (mx, my+15), 1)
\ No newline at end of file
+            pygame.draw.line(screen, (255, 100, 100), (mx, my-15), (mx, my+15), 1)
+        self._cursor_rect = self._cursor_bounds(mouse)
+        drawn.append(self._cursor_rect)
+
+        self._panel_rect = None
+        if self.show_profile:
+            panel = self._refresh_profile()
+            self._panel_rect = screen.blit(panel, (10, 10))
+            drawn.append(self._panel_rect)
+        return drawn
+
+    def _refresh_profile(self):
+        """Profile panel surface with stage timings and counters"""
+        profiler = self.profiler
+        # Percentiles change slowly; re-render the text twice a second at 60 fps
+        if self._profile_frame is None or profiler.frames - self._profile_frame >= 30:
+            self._profile_frame = profiler.frames
+            summary = profiler.summary()
+            lines = [f"{'stage':<12}{'p50':>7}{'p95':>7}{'p99':>7} ms"]
+            for name, row in summary["stages"].items():
+                lines.append(f"{name:<12}{row['p50']:>7.2f}{row['p95']:>7.2f}{row['p99']:>7.2f}")
+            for name, row in summary["counters"].items():
+                lines.append(f"{name:<16}{row['mean']:>9.1f} avg{row['p99']:>9.0f} p99")
+            rendered = [self.profile_font.render(line, True, (230, 230, 230)) for line in lines]
+
+            line_height = rendered[0].get_height() + 2
+            width = max(line.get_width() for line in rendered) + 16
+            panel = pygame.Surface((width, line_height * len(rendered) + 12), pygame.SRCALPHA)
+            panel.fill((0, 0, 0, 160))
+            for i, line in enumerate(rendered):
+                panel.blit(line, (8, 6 + i * line_height))
+            self._profile_panel = panel
+        return self._profile_panel
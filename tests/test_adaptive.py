@@ -0,0 +1,34 @@
+import numpy as np
+
+from cloth.adaptive import AdaptiveIterations
+from cloth.cloth_system import ClothSystem
+
+
+def settle(cloth, steps):
+    for _ in range(steps):
+        cloth.update()
+        if cloth.frame_stats["asleep"]:
+            return True
+    return False
+
+
+def test_small_swinging_piece_keeps_cloth_awake():
+    cloth = ClothSystem(solver="numpy", seed=1, default_cloth=False)
+    cloth.create_cloth(60, 40, 12)
+    cloth.adaptive = AdaptiveIterations()
+    assert settle(cloth, 2000)
+
+    # Cut a 3x3 corner piece loose, hanging from its pinned particle, and swing it
+    x0, y0 = cloth.particles[0][0].x, cloth.particles[0][0].y
+    xc, yc = x0 + 2.5 * 12, y0 + 2.5 * 12
+    cloth.cut_segment(xc, y0 - 20, xc, yc, 2)
+    cloth.cut_segment(x0 - 20, yc, xc, yc, 2)
+    piece = [p for row in cloth.particles[:3] for p in row[:3] if not p.fixed]
+    for p in piece:
+        p.px -= 8
+    cloth.particles_changed()
+    assert settle(cloth, 1000)
+
+    # The piece has stopped swinging by the time the whole cloth sleeps
+    energy = max(0.5 * np.hypot(p.x - p.px, p.y - p.py) ** 2 for p in piece)
+    assert energy < cloth.adaptive.settle_energy
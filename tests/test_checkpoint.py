@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from cloth.adaptive import AdaptiveIterations
+from cloth.checkpoint import load_checkpoint, save_checkpoint
+from cloth.cloth_system import ClothSystem
+from cloth.session import state_digest
+
+
+@pytest.mark.parametrize("solver", ["python", "numpy", "pbd"])
+def test_restored_cloth_continues_like_the_saved_one(solver, tmp_path):
+    cloth = ClothSystem(solver=solver, seed=2)
+    cloth.island_sleep = True
+    cloth.adaptive = AdaptiveIterations()
+    cloth.cut_segment(0, 150, 800, 150, 8)
+    cloth.cut_segment(400, 150, 400, 800, 8)
+    for _ in range(60):
+        cloth.update()
+    assert cloth.islands.asleep.any()
+
+    path = tmp_path / "cloth.ckpt"
+    save_checkpoint(cloth, path)
+    restored = load_checkpoint(path)
+    assert restored.steps == cloth.steps
+    for _ in range(50):
+        cloth.update()
+        restored.update()
+
+    assert np.array_equal(restored.positions(), cloth.positions())
+    assert state_digest(restored) == state_digest(cloth)
+    assert np.array_equal(restored.islands.asleep, cloth.islands.asleep)
+    assert restored.frame_stats == cloth.frame_stats
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from cloth.cloth_system import ClothSystem
+
+
+def test_touching_pieces_at_rest_both_sleep():
+    cloth = ClothSystem(solver="numpy", seed=3, default_cloth=False)
+    cloth.create_cloth(12, 10, 12)
+    cloth.island_sleep = True
+
+    # Drop the lower part of the cloth split down the middle, so two
+    # pieces come to rest side by side on the floor
+    y = cloth.particles[2][0].y + 6
+    mid = cloth.particles[0][5].x + 6
+    cloth.cut_segment(0, y, cloth.WIDTH, y, 3)
+    cloth.cut_segment(mid, y, mid, cloth.HEIGHT, 3)
+    for _ in range(400):
+        cloth.update()
+
+    islands = cloth.islands
+    assert islands.num_islands == 3
+    positions = cloth.positions()
+    floor = [i for i in range(islands.num_islands) if not any(
+        p.fixed for p, label in zip(cloth.flat_particles, islands.labels) if label == i)]
+    assert len(floor) == 2
+
+    # The two pieces on the floor are in contact
+    a = positions[islands.labels == floor[0]]
+    b = positions[islands.labels == floor[1]]
+    gap = np.hypot(*(a[:, None] - b[None, :]).transpose(2, 0, 1)).min()
+    assert gap < islands.contact_radius * 2
+
+    assert islands.asleep.all()
+    assert islands.stats()["active_particles"] == 0
+
+
+@pytest.mark.parametrize("solver", ["python", "numpy", "pbd"])
+def test_dragging_a_held_particle_wakes_its_island(solver):
+    cloth = ClothSystem(solver=solver, seed=3)
+    cloth.island_sleep = True
+    for _ in range(1000):
+        cloth.update()
+        if cloth.islands.asleep.all():
+            break
+    assert cloth.islands.asleep.all()
+
+    # Grab, hold still until the island falls asleep again, then drag
+    target = cloth.flat_particles[700]
+    particle = cloth.grab_particle(target.x, target.y)
+    x, y = particle.x, particle.y
+    for _ in range(1000):
+        particle.move(x, y)
+        cloth.update()
+        if cloth.islands.asleep.all():
+            break
+    assert cloth.islands.asleep.all()
+    before = cloth.positions()
+    for step in range(1, 31):
+        particle.move(x + 3 * step, y + 2 * step)
+        cloth.update()
+
+    assert not cloth.islands.asleep.any()
+    moved = np.hypot(*(cloth.positions() - before).T) > 1.0
+    assert np.count_nonzero(moved) > 1
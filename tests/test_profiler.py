@@ -0,0 +1,20 @@
+import csv
+
+from cloth.profiler import Profiler
+
+
+def test_csv_rows_written_as_frames_end(tmp_path):
+    path = tmp_path / "frames.csv"
+    profiler = Profiler(enabled=True, export=str(path))
+    for frame in range(3):
+        with profiler.stage("springs"):
+            pass
+        profiler.count("live_springs", 100 - frame)
+        profiler.end_frame()
+
+    # Rows are on disk before close()
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["live_springs"]) for row in rows] == [100, 99, 98]
+    assert all(float(row["springs_ms"]) >= 0 for row in rows)
+    profiler.close()
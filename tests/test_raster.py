@@ -0,0 +1,28 @@
+import numpy as np
+import pygame
+
+from graphics.raster import rasterize_triangles
+
+
+def draw_polygons(surface, corners, colors):
+    for points, color in zip(corners.tolist(), colors.tolist()):
+        pygame.draw.polygon(surface, color, points)
+
+
+def test_overlapping_triangles_stack_in_triangle_order():
+    # A large triangle between two small ones it overlaps, and a small one after it
+    corners = np.array([
+        [[10, 10], [30, 10], [10, 30]],
+        [[0, 0], [150, 0], [0, 150]],
+        [[20, 20], [40, 20], [20, 40]],
+        [[100, 5], [120, 5], [100, 25]],
+    ])
+    colors = np.array([[255, 0, 0], [0, 0, 255], [0, 255, 0], [255, 255, 0]])
+    raster = pygame.Surface((160, 160), depth=32)
+    polygons = pygame.Surface((160, 160), depth=32)
+    rasterize_triangles(raster, corners, colors, max_extent=64)
+    draw_polygons(polygons, corners, colors)
+
+    assert raster.get_at((15, 15))[:3] == (0, 0, 255)
+    assert raster.get_at((25, 25))[:3] == (0, 255, 0)
+    assert np.array_equal(pygame.surfarray.array2d(raster), pygame.surfarray.array2d(polygons))
@@ -0,0 +1,43 @@
+import numpy as np
+
+from cloth.cloth_system import ClothSystem
+from cloth.recorder import TrajectoryReader, TrajectoryRecorder
+
+
+def live_pairs(cloth):
+    arrays = cloth.springs.arrays()
+    live = arrays.alive
+    return set(zip(arrays.i1[live].tolist(), arrays.i2[live].tolist()))
+
+
+def test_round_trip_positions_and_breaks(tmp_path):
+    path = tmp_path / "run.traj"
+    cloth = ClothSystem(solver="numpy", seed=6)
+    cloth.max_dead_ratio = None
+    cloth.recorder = TrajectoryRecorder(path, chunk_frames=40)
+    recorded = []
+    removed = {}
+    pairs = live_pairs(cloth)
+    for frame in range(150):
+        if frame == 70:
+            cloth.cut_segment(0, 200, 800, 200)
+        cloth.update()
+        recorded.append(cloth.positions())
+        now = live_pairs(cloth)
+        if pairs - now:
+            removed[frame] = pairs - now
+        pairs = now
+    cloth.recorder.close()
+    assert 70 in removed
+
+    reader = TrajectoryReader(path)
+    assert len(reader) == 150
+    precision = cloth.recorder.precision
+    for frame, positions in enumerate(recorded):
+        assert np.abs(reader.frame(frame) - positions).max() <= precision / 2 + 1e-9
+
+    events = dict(reader.break_events())
+    assert events.keys() == removed.keys()
+    for frame, ids in events.items():
+        i1, i2 = reader.topology(frame)
+        assert set(zip(i1[ids].tolist(), i2[ids].tolist())) == removed[frame]
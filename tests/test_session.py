@@ -0,0 +1,20 @@
+from cloth.cloth_system import ClothSystem
+from cloth.self_collision import SelfCollision
+from cloth.session import SessionRecorder, replay
+
+
+def test_replay_restores_self_collision(tmp_path):
+    path = tmp_path / "session.jsonl"
+    cloth = ClothSystem(solver="numpy", seed=5)
+    cloth.self_collision = SelfCollision(thickness=4.0)
+    with SessionRecorder(path, cloth) as session:
+        # Cut the lower part loose so it piles up and collides with itself
+        session.log("cut", x0=0, y0=200, x1=800, y1=200)
+        cloth.cut_segment(0, 200, 800, 200)
+        for _ in range(120):
+            cloth.update()
+
+    replayed, stats = replay(path)
+    assert replayed.self_collision is not None
+    assert replayed.self_collision.settings() == cloth.self_collision.settings()
+    assert stats["matches"]
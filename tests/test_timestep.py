@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from cloth.cloth_system import ClothSystem
+from cloth.timestep import FixedTimestep
+
+
+def test_dragged_particle_does_not_stop_interpolation():
+    cloth = ClothSystem(solver="numpy", seed=2)
+    timestep = FixedTimestep(physics_hz=60)
+    timestep.run(cloth, 2.5 / 60)  # Two steps and half a step banked
+    previous = timestep._previous.copy()
+    stepped = cloth.positions()
+
+    dragged = cloth.flat_particles[200]
+    dragged.move(dragged.x + 30, dragged.y + 40)
+    shown = timestep.interpolated_positions(cloth)
+
+    expected = previous + (stepped - previous) * timestep.alpha
+    others = np.arange(len(shown)) != 200
+    assert 0 < timestep.alpha < 1
+    assert np.allclose(shown[others], expected[others])
+    assert shown[200].tolist() == [dragged.x, dragged.y]
+
+
+@pytest.mark.parametrize("physics_hz", [0, -30])
+def test_physics_rate_must_be_positive(physics_hz):
+    with pytest.raises(ValueError):
+        FixedTimestep(physics_hz=physics_hz)
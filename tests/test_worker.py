@@ -0,0 +1,97 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from cloth import worker
+from cloth.worker import ClothWorker, SharedState
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def state():
+    shm = shared_memory.SharedMemory(create=True, size=SharedState.size(4, 3))
+    state = SharedState(shm, 4, 3)
+    state.header[:] = 0
+    yield state
+    del state
+    shm.close()
+    shm.unlink()
+
+
+def test_publish_never_writes_the_buffer_being_read(state):
+    positions = np.zeros((4, 2))
+    alive = np.ones(3, dtype=np.uint8)
+    reading = state.acquire()
+    held = state.positions[reading].copy()
+    for frame in range(1, 10):
+        state.publish(positions + frame, alive)
+        assert int(state.header[worker._FRONT]) != reading
+        assert np.array_equal(state.positions[reading], held)
+
+    # The newest state is the one handed out next
+    front = state.acquire()
+    assert np.array_equal(state.positions[front], positions + 9)
+    assert int(state.header[worker._FRAME]) == 9
+
+
+def test_command_ring_keeps_order_and_refuses_when_full(state):
+    assert state.push(worker._MOVE, 2, 10.0, 20.0)
+    assert state.push(worker._CUT, 0.0, 1.0, 2.0, 3.0, 4.0)
+    assert state.drain() == [[worker._MOVE, 2, 10.0, 20.0, 0.0, 0.0], [worker._CUT, 0.0, 1.0, 2.0, 3.0, 4.0]]
+    assert state.drain() == []
+
+    for i in range(worker._CMD_CAPACITY):
+        assert state.push(worker._MOVE, i, 0.0, 0.0)
+    assert not state.push(worker._MOVE, 0, 0.0, 0.0)
+    records = state.drain()
+    assert [int(record[1]) for record in records] == list(range(worker._CMD_CAPACITY))
+    assert state.push(worker._MOVE, 0, 0.0, 0.0)
+
+
+def test_worker_applies_moves_and_cuts_and_cleans_up():
+    cloth = ClothWorker(solver="numpy", seed=1)
+    name = cloth._shm.name
+    try:
+        assert wait_for(lambda: cloth.stats()["published"] > 0)
+
+        # Drag a particle: the published positions follow it
+        x, y = cloth.positions()[400].tolist()
+        particle = cloth.grab_particle(x, y)
+        assert particle is not None and particle.index == 400
+
+        def dragged():
+            particle.move(x + 60, y + 40)
+            return np.hypot(*(cloth.positions()[400] - (x, y))) > 30
+
+        assert wait_for(dragged)
+
+        # Cut across the cloth: the published spring liveness drops
+        live = len(cloth.springs)
+        assert cloth.cut_segment(0, 200, 800, 200)
+        assert wait_for(lambda: len(cloth.positions()) and len(cloth.springs) < live)
+        state = cloth._state
+        front = state.acquire()
+        assert np.count_nonzero(state.alive[front]) == len(cloth.springs)
+        assert cloth.stats()["dropped_commands"] == 0
+
+        # With the worker stopped nothing drains the ring, so commands past its capacity are dropped
+        state.header[worker._RUNNING] = 0
+        cloth._process.join(timeout=10)
+        for _ in range(worker._CMD_CAPACITY + 5):
+            cloth.move_particle(0, 0.0, 0.0)
+        assert cloth.dropped_commands >= 5
+    finally:
+        cloth.close()
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)